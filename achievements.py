@@ -0,0 +1,83 @@
+# achievements.py
+# Event-driven stats and achievements. Gameplay events update running stats
+# through STAT_RULES; each stat keeps its locked achievements sorted by target,
+# so an update is one comparison against the next threshold no matter how many
+# achievements exist. Stats are written back to the profile (and saved through
+# the background writer) at the end of a run or when something unlocks, not
+# every frame.
+from sim import EV_COIN, EV_NEAR_MISS, EV_MISSION, EV_DISTANCE
+
+# id, stat, target, title. Ids are the keys stored under "achievements" in the save.
+ACHIEVEMENTS = [
+    ("coins_100",      "total_coins",        100,   "Pocket Change: collect 100 coins"),
+    ("coins_1000",     "total_coins",        1000,  "Coin Hoarder: collect 1,000 coins"),
+    ("missions_10",    "missions_completed", 10,    "Contractor: complete 10 missions"),
+    ("distance_5000",  "distance_total",     5000,  "Road Trip: drive 5,000 m"),
+    ("distance_50000", "distance_total",     50000, "Long Haul: drive 50,000 m"),
+    ("near_miss_100",  "near_misses",        100,   "Close Shave: 100 near misses"),
+    ("combo_10",       "best_combo",         10,    "Daredevil: reach a x10 near-miss combo"),
+]
+
+ADD, MAX = "add", "max"
+
+# event kind -> ((stat, how, amount), ...); amount None means use the event's value
+STAT_RULES = {
+    EV_COIN:      (("total_coins", ADD, None),),
+    EV_DISTANCE:  (("distance_total", ADD, None),),
+    EV_NEAR_MISS: (("near_misses", ADD, 1), ("best_combo", MAX, None)),
+    EV_MISSION:   (("missions_completed", ADD, 1),),
+}
+
+class Achievements:
+    def __init__(self, profile, table=ACHIEVEMENTS, rules=STAT_RULES):
+        self.profile = profile
+        self.rules = rules
+        self.titles = {a[0]: a[3] for a in table}
+        self.values = {}                         # stat -> current value
+        self.pending = {}                        # stat -> (how, amount not yet in the profile)
+        self.ladder = {}                         # stat -> [(target, id), ...] still locked, ascending
+        self.next = {}                           # stat -> next target on the ladder (None when done)
+        self.unlocked = []                       # ids unlocked this session, newest last
+        for aid, stat, target, _ in sorted(table, key=lambda a: a[2]):
+            if not profile.achievement(aid): self.ladder.setdefault(stat, []).append((target, aid))
+        for stat in {a[1] for a in table} | {r[0] for rs in rules.values() for r in rs}:
+            self.values[stat] = profile.stat(stat)
+            self._advance(stat)
+        self.commit()                            # unlock anything an older save already earned
+
+    def _advance(self, stat):
+        ladder = self.ladder.get(stat)
+        value = self.values[stat]
+        while ladder and value >= ladder[0][0]:
+            _, aid = ladder.pop(0)
+            self.profile.unlock_achievement(aid); self.unlocked.append(aid)
+        self.next[stat] = ladder[0][0] if ladder else None
+
+    def bump(self, stat, amount=1, how=ADD):
+        v = self.values.get(stat, 0)
+        nv = v + amount if how == ADD else max(v, amount)
+        if nv == v: return
+        self.values[stat] = nv
+        acc = self.pending.get(stat, (how, 0))[1]
+        self.pending[stat] = (how, acc + amount if how == ADD else nv)
+        nxt = self.next.get(stat)
+        if nxt is not None and nv >= nxt:
+            self._advance(stat); self.commit()
+
+    def handle(self, kind, value):
+        """Feed one sim event; kinds without rules cost a dict miss."""
+        rules = self.rules.get(kind)
+        if rules:
+            for stat, how, amount in rules: self.bump(stat, value if amount is None else amount, how)
+
+    def commit(self):
+        """Write pending stat changes into the profile and queue a save."""
+        if self.pending:
+            st = self.profile.data["stats"]
+            for stat, (how, amount) in self.pending.items():
+                st[stat] = st.get(stat, 0) + amount if how == ADD else max(st.get(stat, 0), amount)
+            self.pending.clear(); self.profile.touch("stats")
+        self.profile.save()
+
+    def title(self, aid):
+        return self.titles.get(aid, aid)
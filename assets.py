@@ -0,0 +1,98 @@
+# assets.py
+# One place that resolves and caches fonts, images and sounds. Each font
+# (family, size, bold) is built once and shared; sounds are decoded into pygame.mixer.Sound buffers on a background thread so they never
+# hold up the first frame. Every load is timed (see report()).
+import os, threading, time
+import pygame
+
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+SOUND_FILES = ("carMove.mp3", "crash.mp3")
+
+class Assets:
+    def __init__(self, root=ASSET_DIR):
+        self.root = root
+        self._fonts = {}         # (family, size, bold) -> Font
+        self._images = {}
+        self._sounds = {}        # name -> Sound, or None if it failed to load
+        self._lock = threading.Lock()
+        self._loader = None
+        self.timings = {}        # "kind:name" -> seconds spent loading
+        self.errors = {}
+        self.t0 = time.perf_counter()
+
+    def path(self, name):
+        return name if os.path.isabs(name) else os.path.join(self.root, name)
+
+    def _timed(self, key, t):
+        with self._lock: self.timings[key] = time.perf_counter() - t
+
+    def mark(self, name):
+        """Record a startup milestone as seconds since the Assets object was created."""
+        self.timings.setdefault("mark:" + name, time.perf_counter() - self.t0)
+
+    # ---- fonts ----
+    def font(self, family="arial", size=16, bold=False):
+        """Cached SysFont; the first call also pays for pygame's system font scan."""
+        key = (family, size, bold)
+        f = self._fonts.get(key)
+        if f is None:
+            t = time.perf_counter()
+            f = self._fonts[key] = pygame.font.SysFont(family, size, bold=bold)
+            self._timed(f"font:{family} {size}{' bold' if bold else ''}", t)
+        return f
+
+    # ---- images ----
+    def image(self, name, alpha=True):
+        img = self._images.get(name)
+        if img is None:
+            t = time.perf_counter()
+            img = pygame.image.load(self.path(name))
+            if pygame.display.get_surface() is not None:
+                img = img.convert_alpha() if alpha else img.convert()
+            self._images[name] = img
+            self._timed("image:" + name, t)
+        return img
+
+    # ---- sounds ----
+    def _load_sound(self, name):
+        t = time.perf_counter()
+        try:
+            snd = pygame.mixer.Sound(self.path(name))       # decodes the whole file into a buffer
+        except (pygame.error, FileNotFoundError) as e:
+            snd = None; self.errors[name] = str(e)
+        with self._lock: self._sounds[name] = snd
+        self._timed("sound:" + name, t)
+        return snd
+
+    def preload_sounds(self, names):
+        """Decode `names` on a background thread; sound() returns them once ready."""
+        todo = [n for n in names if n not in self._sounds]
+        if not todo: return
+        def run():
+            for n in todo: self._load_sound(n)
+        self._loader = threading.Thread(target=run, name="asset-loader", daemon=True)
+        self._loader.start()
+
+    def sound(self, name, wait=False):
+        """The decoded Sound, or None while it is still loading (or failed).
+        wait=True loads it synchronously if no background load has it yet."""
+        with self._lock:
+            if name in self._sounds: return self._sounds[name]
+        if wait:
+            if self._loader is not None and self._loader.is_alive(): self._loader.join()
+            with self._lock:
+                if name in self._sounds: return self._sounds[name]
+            return self._load_sound(name)
+        return None
+
+    def wait(self, timeout=None):
+        if self._loader is not None: self._loader.join(timeout)
+
+    def report(self):
+        """Load timings, slowest first, as printable lines."""
+        with self._lock: items = sorted(self.timings.items(), key=lambda kv: -kv[1])
+        lines = [f"{v*1000:8.1f} ms  {k}" for k, v in items]
+        lines += [f"   error    {k}: {e}" for k, e in self.errors.items()]
+        return lines
+
+ASSETS = Assets()
@@ -0,0 +1,134 @@
+# audio.py
+# Engine loop and gameplay one-shots. Everything is decoded (and the engine's
+# pitch variants resampled) once, on a background thread; the frame thread
+# only starts sounds and sets channel volumes.
+#
+# Channels: the first len(ENGINE_PITCHES) are reserved for the engine, one
+# looping pitch variant each, and speed crossfades between the two variants
+# either side of it. One-shots share a fixed pool of VOICES channels; when all
+# are busy a new sound steals the oldest voice of the lowest priority, never
+# one that outranks it.
+import math, threading, time
+import numpy as np
+import pygame
+from sim import EV_COIN, EV_POWERUP, EV_NEAR_MISS, EV_CRASH, SLOW_FACTOR
+
+MIXER_FREQ = 44100
+MIXER_BUFFER = 512          # samples, ~12 ms at 44.1 kHz (pygame's default 4096 is ~90 ms)
+VOICES = 6
+
+ENGINE_FILE = "carMove.mp3"
+ENGINE_PITCHES = (0.8, 1.0, 1.25, 1.55)
+ENGINE_SPEEDS = (120.0, 420.0)      # road speed mapped onto the lowest..highest pitch
+ENGINE_MIX = 0.6                    # engine loudness relative to the one-shots
+CRASH_FILE = "crash.mp3"
+
+# event -> (sound, priority)
+ONE_SHOTS = {EV_CRASH: ("crash", 3), EV_POWERUP: ("powerup", 2), EV_NEAR_MISS: ("near_miss", 1), EV_COIN: ("coin", 0)}
+# synthesized blips: sound -> [(Hz, ms), ...] played back to back
+TONES = {"coin": [(988, 50), (1319, 90)], "powerup": [(523, 60), (659, 60), (784, 110)], "near_miss": [(660, 70)]}
+
+def pre_init(buffer=MIXER_BUFFER):
+    """Call before pygame.init() so the mixer opens with a small buffer."""
+    pygame.mixer.pre_init(MIXER_FREQ, -16, 2, buffer)
+
+def engine_level(sim):
+    """0..1 position of the sim's current road speed on the engine's pitch range."""
+    lo, hi = ENGINE_SPEEDS
+    speed = sim.speed * (SLOW_FACTOR if sim.slow_t > 0 else 1.0)
+    return max(0.0, min(1.0, (speed - lo) / (hi - lo)))
+
+# ---------------- Decoding ----------------
+def _tone(notes, rate, channels):
+    parts = []
+    for hz, ms in notes:
+        t = np.arange(int(rate * ms / 1000)) / rate
+        parts.append(np.sin(2*math.pi*hz*t) * np.linspace(1.0, 0.0, len(t)))   # linear decay
+    wave = (np.concatenate(parts) * 0.35 * 32767).astype(np.int16)
+    return pygame.sndarray.make_sound(np.ascontiguousarray(np.repeat(wave[:, None], channels, axis=1)))
+
+def _pitched(snd, ratio):
+    """`snd` resampled (linear interpolation) to play `ratio` times faster."""
+    a = pygame.sndarray.array(snd).astype(np.float32)
+    pos = np.arange(0, len(a) - 1, ratio); i = pos.astype(np.int64); f = (pos - i)[:, None]
+    out = a[i]*(1 - f) + a[i + 1]*f
+    return pygame.sndarray.make_sound(np.ascontiguousarray(out.astype(np.int16)))
+
+class Audio:
+    def __init__(self, assets, volume=0.25, voices=VOICES):
+        self.volume = volume
+        self.sounds = {}; self.engine = []
+        self.ready = False; self.error = None
+        self.engine_on = False; self.level = 0.0
+        self.steals = self.dropped = 0
+        self.enabled = pygame.mixer.get_init() is not None
+        if not self.enabled: return
+        n = len(ENGINE_PITCHES)
+        pygame.mixer.set_num_channels(n + voices); pygame.mixer.set_reserved(n)
+        self.engine_ch = [pygame.mixer.Channel(i) for i in range(n)]
+        self.pool = [pygame.mixer.Channel(n + i) for i in range(voices)]
+        self.voice = [(-1, 0.0)]*voices        # (priority, start time) of what each pool channel last played
+        threading.Thread(target=self._load, args=(assets,), name="audio-load", daemon=True).start()
+
+    def _load(self, assets):
+        try:
+            rate, size, channels = pygame.mixer.get_init()
+            sounds = {name: _tone(notes, rate, channels) for name, notes in TONES.items()} if size == -16 else {}
+            crash = assets.sound(CRASH_FILE, wait=True)
+            if crash is not None: sounds["crash"] = crash
+            engine = assets.sound(ENGINE_FILE, wait=True)
+            self.engine = [_pitched(engine, p) for p in ENGINE_PITCHES] if engine is not None and size == -16 else []
+            self.sounds = sounds
+        except (pygame.error, ValueError) as e:
+            self.error = str(e)
+        self.ready = True
+
+    # ---- one-shots ----
+    def play(self, name, priority=0):
+        snd = self.sounds.get(name)
+        if snd is None: return
+        pick = None
+        for i, ch in enumerate(self.pool):
+            if not ch.get_busy(): pick = i; break
+            if self.voice[i][0] <= priority and (pick is None or self.voice[i] < self.voice[pick]): pick = i
+        if pick is None: self.dropped += 1; return
+        ch = self.pool[pick]
+        if ch.get_busy(): self.steals += 1
+        ch.play(snd); ch.set_volume(self.volume)
+        self.voice[pick] = (priority, time.perf_counter())
+
+    def handle(self, kind, value):
+        """Feed a sim event; plays its one-shot, a crash also cuts the engine."""
+        shot = ONE_SHOTS.get(kind)
+        if shot is None or not self.ready: return
+        self.play(*shot)
+        if kind == EV_CRASH: self.update(False)
+
+    # ---- engine ----
+    def update(self, running, level=0.0):
+        """Once per frame: whether the engine should be heard and at what speed level."""
+        if not self.ready or not self.engine: return
+        if running != self.engine_on:
+            self.engine_on = running
+            if not running:
+                for ch in self.engine_ch: ch.fadeout(150)
+                return
+            for ch, snd in zip(self.engine_ch, self.engine): ch.play(snd, loops=-1)
+            self.level = None
+        if running and level != self.level: self.level = level; self._mix()
+
+    def _mix(self):
+        if not self.engine_on: return
+        x = self.level * (len(self.engine) - 1); lo = min(int(x), len(self.engine) - 2); f = x - lo
+        gain = self.volume * ENGINE_MIX
+        for i, ch in enumerate(self.engine_ch):
+            w = math.cos(f*math.pi/2) if i == lo else math.sin(f*math.pi/2) if i == lo + 1 else 0.0   # equal-power crossfade
+            ch.set_volume(gain * w)
+
+    # ---- volume ----
+    def set_volume(self, v):
+        self.volume = v
+        if not self.enabled: return
+        for ch in self.pool:
+            if ch.get_busy(): ch.set_volume(v)
+        self._mix()
@@ -0,0 +1,184 @@
+# batch_env.py
+# N independent Traffic Rush games stepped in lockstep with NumPy, for training
+# lane-change agents. Follows the same rules as sim.Simulation (spawning, gap
+# gating, movement, culling, collisions, pickups, near-misses, combo decay) but
+# keeps every game's state in (n,) / (n, capacity) arrays. Envs that crash are
+# reset in place. Uses its own NumPy RNG, so runs are reproducible per seed but
+# not bit-identical to a Simulation with the same seed.
+import numpy as np
+from sim import (DIFFS, LANES, LANE_X, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT,
+                 COIN_SIZE, PWR_SIZE, POWERUP_KINDS, POWERUP_TIME, SLOW_FACTOR, CULL_Y, NEAR_MISS_GAP,
+                 SPAWN_GAP, MAGNET_RANGE, MAGNET_PULL, SIM_DT)
+from entities import KIND_ENEMY, KIND_COIN, KIND_POWERUP
+
+GRID_ROWS = 12          # observation rows, each HEIGHT/GRID_ROWS px tall
+ROW_H = HEIGHT / GRID_ROWS
+CAPACITY = 48           # entity slots per env
+PLAYER_Y = HEIGHT - 120
+CARS_PER_SPAWN = np.array([1, 2, 2, 3])
+SIZES = np.array([[ENEMY_WIDTH, ENEMY_HEIGHT], [COIN_SIZE, COIN_SIZE], [PWR_SIZE, PWR_SIZE]], float)
+PWR_TIME = np.array([POWERUP_TIME[k] for k in POWERUP_KINDS])
+
+class BatchEnv:
+    def __init__(self, n, diff="Normal", seed=None, rain=False, coin_reward=10.0, params=None):
+        self.n = n; self.rain = rain; self.coin_reward = coin_reward
+        d = dict(DIFFS[diff]); d.update(params or {})
+        self.start_speed = d["START_SPEED"]; self.speed_ramp = d["SPEED_RAMP"]
+        self.spawn_lo, self.spawn_hi = d["SPAWN"]
+        self.rng = np.random.default_rng(seed)
+        self.lane_x = np.array(LANE_X, float)
+        # per-env state
+        self.lane = np.zeros(n, np.int64)
+        self.speed = np.zeros(n); self.elapsed = np.zeros(n); self.score = np.zeros(n)
+        self.spawn_t = np.zeros(n); self.coin_t = np.zeros(n); self.pwr_t = np.zeros(n)
+        self.pwr_left = np.zeros((n, len(POWERUP_KINDS)))  # SLOW, GHOST, MAGNET seconds left
+        self.combo = np.zeros(n, np.int64); self.coins = np.zeros(n, np.int64)
+        self.episodes = np.zeros(n, np.int64)
+        # per-entity state, (n, CAPACITY)
+        shape = (n, CAPACITY)
+        self.alive = np.zeros(shape, bool); self.counted = np.zeros(shape, bool)
+        self.kind = np.zeros(shape, np.int64); self.elane = np.zeros(shape, np.int64)
+        self.variant = np.zeros(shape, np.int64)  # powerup kind index
+        self.x = np.zeros(shape); self.y = np.zeros(shape)
+        self.w = np.zeros(shape); self.h = np.zeros(shape); self.sf = np.ones(shape)
+        self._rows = np.arange(n)
+        self.reset()
+
+    # ---------------- resets ----------------
+    def reset(self, mask=None):
+        """Reset the envs selected by `mask` (all when None) and return observations."""
+        m = np.ones(self.n, bool) if mask is None else mask
+        k = int(m.sum())
+        if k:
+            self.lane[m] = LANES//2
+            self.speed[m] = self.start_speed; self.elapsed[m] = 0; self.score[m] = 0
+            self.spawn_t[m] = self.rng.uniform(self.spawn_lo, self.spawn_hi, k)
+            self.coin_t[m] = self.rng.uniform(1.2, 2.2, k); self.pwr_t[m] = self.rng.uniform(6.0, 10.0, k)
+            self.pwr_left[m] = 0; self.combo[m] = 0; self.coins[m] = 0
+            self.alive[m] = False
+        return self.observe()
+
+    # ---------------- spawning ----------------
+    def _free_slots(self, envs, count):
+        """First `count` free slot ids for each env in `envs`, plus a validity mask."""
+        order = np.argsort(self.alive[envs], axis=1, kind="stable")[:, :count]
+        return order, ~np.take_along_axis(self.alive[envs], order, 1)
+
+    def _place(self, envs, slots, ok, kind, lanes, y, sf=None, variant=None):
+        e = np.broadcast_to(envs[:, None], slots.shape)[ok]; s = slots[ok]; ln = lanes[ok]
+        self.alive[e, s] = True; self.counted[e, s] = False
+        self.kind[e, s] = kind; self.elane[e, s] = ln
+        self.x[e, s] = self.lane_x[ln]; self.y[e, s] = y
+        self.w[e, s], self.h[e, s] = SIZES[kind]
+        self.sf[e, s] = 1.0 if sf is None else sf[ok]
+        self.variant[e, s] = 0 if variant is None else variant[ok]
+
+    def _spawn(self, dt):
+        rng = self.rng
+        self.spawn_t -= dt
+        envs = np.flatnonzero(self.spawn_t <= 0)
+        if len(envs):
+            k = len(envs)
+            # topmost enemy per (env, lane) decides whether the lane has a clear gap
+            ey = np.where(self.alive[envs] & (self.kind[envs] == KIND_ENEMY), self.y[envs], np.inf)
+            top = np.stack([np.where(self.elane[envs] == l, ey, np.inf).min(1) for l in range(LANES)], 1)
+            clear = (top == np.inf) | (top - ENEMY_HEIGHT > SPAWN_GAP)
+            order = np.argsort(rng.random((k, LANES)), 1)            # shuffled lane order
+            clear = np.take_along_axis(clear, order, 1)
+            want = CARS_PER_SPAWN[rng.integers(0, len(CARS_PER_SPAWN), k)]
+            pick = clear & (np.cumsum(clear, 1) <= want[:, None])
+            lanes = np.where(pick, order, 0)
+            # pack the picked lanes to the front, then give each a free slot
+            packed = np.argsort(~pick, 1, kind="stable")[:, :3]
+            lanes = np.take_along_axis(lanes, packed, 1); pick = np.take_along_axis(pick, packed, 1)
+            slots, free = self._free_slots(envs, 3)
+            sf = rng.uniform(0.85, 1.2, (k, 3))
+            self._place(envs, slots, pick & free, KIND_ENEMY, lanes, -ENEMY_HEIGHT, sf)
+            self.spawn_t[envs] = rng.uniform(self.spawn_lo, self.spawn_hi, k) * np.maximum(0.55, 1.0 - self.elapsed[envs]/120.0)
+        for timer, kind, size, lo, hi in ((self.coin_t, KIND_COIN, COIN_SIZE, 1.2, 2.2),
+                                           (self.pwr_t, KIND_POWERUP, PWR_SIZE, 6.0, 10.0)):
+            timer -= dt
+            envs = np.flatnonzero(timer <= 0)
+            if not len(envs): continue
+            k = len(envs)
+            slots, free = self._free_slots(envs, 1)
+            lanes = rng.integers(0, LANES, (k, 1))
+            variant = rng.integers(0, len(POWERUP_KINDS), (k, 1)) if kind == KIND_POWERUP else None
+            self._place(envs, slots, free, kind, lanes, -size, variant=variant)
+            timer[envs] = rng.uniform(lo, hi, k)
+
+    # ---------------- step ----------------
+    def step(self, actions, dt=SIM_DT):
+        """Advance every env one step. `actions` is an (n,) int array of lane
+        deltas in {-1, 0, 1}. Returns (obs, reward, done, info); envs that crashed
+        this step are already reset in the returned observation."""
+        rng = self.rng; n = self.n
+        actions = np.asarray(actions)
+        # lane changes (with the rain drift rule from Car.move_lane)
+        target = np.clip(self.lane + actions, 0, LANES-1)
+        if self.rain:
+            slip = (actions != 0) & (rng.random(n) < 0.18) & (target > 0) & (target < LANES-1)
+            target = np.clip(target + slip*rng.choice([-1, 1], n), 0, LANES-1)
+        self.lane = target
+        score0 = self.score.copy()
+        self.elapsed += dt
+        self.speed += (self.speed_ramp/60.0)*dt
+        np.maximum(self.pwr_left - dt, 0, out=self.pwr_left)
+        self.score += self.speed*dt/10.0
+        self._spawn(dt)
+        # move
+        sfac = np.where(self.pwr_left[:, 0] > 0, SLOW_FACTOR, 1.0)
+        move = (self.speed*sfac*dt)[:, None]
+        px = self.lane_x[self.lane][:, None]
+        magnet = np.flatnonzero(self.pwr_left[:, 2] > 0)
+        if len(magnet):
+            coins = self.alive[magnet] & (self.kind[magnet] == KIND_COIN)
+            dx = px[magnet] - self.x[magnet]; dy = PLAYER_Y - self.y[magnet]
+            dist = np.hypot(dx, dy)
+            pull = np.where(coins & (dist > 1) & (dist < MAGNET_RANGE), MAGNET_PULL*dt/np.maximum(dist, 1), 0)
+            self.x[magnet] += dx*pull; self.y[magnet] += dy*pull
+        self.y += move*self.sf
+        # cull
+        self.alive &= self.y - self.h/2 <= CULL_Y
+        # collisions and pickups
+        hit = self.alive & (np.abs(self.x - px)*2 < self.w + PLAYER_WIDTH) & (np.abs(self.y - PLAYER_Y)*2 < self.h + PLAYER_HEIGHT)
+        enemy = self.kind == KIND_ENEMY
+        crash = (hit & enemy).any(1) & (self.pwr_left[:, 1] <= 0)
+        got_coin = hit & (self.kind == KIND_COIN)
+        coins = got_coin.sum(1); self.coins += coins
+        got_pwr = hit & (self.kind == KIND_POWERUP)
+        if got_pwr.any():
+            for p in range(len(POWERUP_KINDS)):
+                took = (got_pwr & (self.variant == p)).any(1)
+                self.pwr_left[took, p] = PWR_TIME[p]
+        self.alive &= ~(got_coin | got_pwr)
+        # near-misses: enemies in the player's lane whose bottom edge just crossed the player's top
+        ptop = PLAYER_Y - PLAYER_HEIGHT/2
+        gap = self.y + self.h/2 - ptop
+        nm = self.alive & enemy & ~self.counted & (self.elane == self.lane[:, None]) & (gap > 0) & (gap < NEAR_MISS_GAP)
+        self.counted |= nm
+        k = nm.sum(1)
+        self.score += 20*k + 10*(k*self.combo + k*(k+1)//2)
+        self.combo += k
+        decay = rng.random(n) < 0.01
+        self.combo[decay] = np.maximum(0, self.combo[decay] - 1)
+        # rewards, then reset crashed envs
+        delta = self.score - score0
+        reward = delta + self.coin_reward*coins
+        info = dict(score_delta=delta, near_miss=k, coins=coins,
+                    final_score=np.where(crash, self.score, 0.0), final_elapsed=np.where(crash, self.elapsed, 0.0))
+        self.episodes += crash
+        if crash.any(): self.reset(crash)
+        return self.observe(), reward, crash, info
+
+    # ---------------- observations ----------------
+    def observe(self):
+        """grid: (n, 3, GRID_ROWS, LANES) uint8 occupancy for enemies, coins, powerups;
+        lane: (n,) player lane; speed: (n,) px/s; powerups: (n, 3) seconds left."""
+        row = np.floor(self.y / ROW_H).astype(np.int64)
+        ok = self.alive & (row >= 0) & (row < GRID_ROWS)
+        env = np.broadcast_to(self._rows[:, None], row.shape)
+        cell = ((env*3 + self.kind)*GRID_ROWS + row)*LANES + self.elane
+        grid = np.bincount(cell[ok], minlength=self.n*3*GRID_ROWS*LANES) > 0
+        return dict(grid=grid.reshape(self.n, 3, GRID_ROWS, LANES).astype(np.uint8),
+                    lane=self.lane.copy(), speed=self.speed.copy(), powerups=self.pwr_left.copy())
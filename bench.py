@@ -0,0 +1,250 @@
+# bench.py
+# Headless benchmarks for the game loop's hot paths, run under SDL's dummy
+# drivers in a scratch directory (the real data.json / history.db are never
+# touched). Every benchmark is seeded, warmed up, then timed over several
+# repeats; the fastest repeat (the least disturbed by the rest of the machine)
+# is reported as ns/frame alongside transient heap use
+# (peak KiB allocated within a frame) and net allocated blocks per frame.
+#
+#   python bench.py                          # run everything, print a table
+#   python bench.py --save bench_baseline.json
+#   python bench.py --compare bench_baseline.json --threshold 0.15   # exit 1 on regressions
+#   python bench.py -k draw                  # only benchmarks whose name contains "draw"
+#
+# Baselines are machine specific: record them on the machine that compares.
+import os, shutil, sys, tempfile
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy"); os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+import argparse, json, random, statistics, time, tracemalloc, types
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WARMUP = 60
+FRAMES = 300
+REPEATS = 5
+ALLOC_FRAMES = 60
+SEED = 1234
+
+BENCHES = {}     # name -> (setup, frames scale); setup returns the per-frame callable
+
+def bench(name, scale=1.0):
+    """Register a benchmark; `scale` shrinks the frame counts for slow ones (disk I/O)."""
+    def register(setup):
+        BENCHES[name] = (setup, scale); return setup
+    return register
+
+# ---------------- Fixtures ----------------
+_game = None
+
+def game():
+    """One shared Game, built the first time a benchmark needs it."""
+    global _game
+    if _game is None:
+        import traffic_rush as tr
+        _game = tr.Game(); _game.daily.stop()
+        _game.tr = tr
+        while _game.audio.enabled and not _game.audio.ready: time.sleep(0.01)   # loader threads would skew the first timings
+    return _game
+
+def play_sim(g, spawn=None, steps=600, seed=SEED):
+    """Put `g` mid-run on a seeded sim, ghosted so it never crashes, after `steps` steps."""
+    from sim import Simulation, SIM_DT
+    from replay import Replay
+    g.sim = Simulation("Normal", g.selected_vehicle, seed=seed, params=dict(SPAWN=spawn) if spawn else None)
+    g.replay = Replay.for_sim(g.sim); g.actions = []; g.state = g.tr.STATE_PLAY; g.alpha = 0.5
+    random.seed(seed)
+    for _ in range(steps):
+        g.sim.ghost_t = 1e9; g.sim.step(SIM_DT, (random.choice((-1, 1)),) if random.random() < 0.05 else ())
+    return g.sim
+
+def big_profile_data(vehicles=400):
+    from data import DEFAULT_DATA
+    import copy
+    d = copy.deepcopy(DEFAULT_DATA); d["coins"] = 123456
+    for i in range(vehicles):
+        d["vehicles"][f"car{i:03d}"] = {"unlocked": i % 3 == 0, "acceleration": i % 7, "speed": i % 5, "magnet": i % 4, "duration": i % 6}
+    for i in range(200): d["stats"][f"stat_{i}"] = i * 1.5; d["achievements"][f"ach_{i}"] = bool(i % 2)
+    return d
+
+# ---------------- Simulation ----------------
+def _update_play(spawn):
+    def setup():
+        from sim import SIM_DT
+        g = game(); play_sim(g, spawn)
+        def frame():
+            g.sim.ghost_t = 1e9
+            if g.sim.frame % 20 == 0: g.actions.append(random.choice((-1, 1)))
+            g.update_play(SIM_DT)
+        return frame
+    return setup
+
+def _sim_step(spawn):
+    def setup():
+        """Bare Simulation.step, no Game around it: the headless throughput tools
+        (tuner, mission estimates) get. Normal traffic must stay well over 50,000 steps/s."""
+        from sim import Simulation, SIM_DT
+        sim = Simulation("Normal", seed=SEED, params=dict(SPAWN=spawn) if spawn else None)
+        rng = random.Random(SEED)
+        def frame():
+            sim.ghost_t = 1e9
+            sim.step(SIM_DT, (rng.choice((-1, 1)),) if rng.random() < 0.05 else ())
+        for _ in range(600): frame()
+        return frame
+    return setup
+
+bench("sim_step[normal]")(_sim_step(None))
+bench("sim_step[dense]")(_sim_step((0.12, 0.25)))
+bench("update_play[sparse]")(_update_play((1.6, 2.4)))
+bench("update_play[normal]")(_update_play(None))
+bench("update_play[dense]")(_update_play((0.12, 0.25)))
+
+# ---------------- Rendering ----------------
+def _draw_world(spawn=None, rain=False, night=False):
+    def setup():
+        g = game(); sim = play_sim(g, spawn); g.rain = rain; g.night = night
+        from sim import SIM_DT
+        if rain:
+            g.weather.__init__(seed=SEED)
+            for _ in range(30): g.weather.update(SIM_DT, sim)
+        def frame():
+            g.alpha = (g.alpha + 0.37) % 1.0
+            g.draw_game_world(g.tr.WIN)
+        return frame
+    return setup
+
+bench("draw_game_world")(_draw_world())
+bench("draw_game_world[dense]")(_draw_world((0.12, 0.25)))
+bench("draw_game_world[night]")(_draw_world(night=True))
+bench("draw_game_world[rain]")(_draw_world(rain=True))
+
+@bench("draw_game_hud")
+def _():
+    from missions import CATALOG, Mission
+    g = game(); sim = play_sim(g)
+    sim.missions = [Mission(d) for d in list(CATALOG.values())[:2]]
+    for m in sim.missions: m.start(sim)
+    def frame():
+        sim.score += 7.3; g.draw_game_hud(g.tr.WIN)
+    return frame
+
+@bench("draw_missions[500]")
+def _():
+    from missions import MissionDef
+    g = game(); play_sim(g, steps=0)
+    defs = [MissionDef.single(("survive", "coins", "combo", "distance")[i % 4], 10 + i, 100 + i) for i in range(500)]
+    g.mission_list = defs; g.mission_view.set_items(defs); g.mission_view.scroll = 0
+    view = g.mission_view
+    def frame():
+        if not view.scroll_by(53): view.scroll = 0        # keep scrolling so cards miss the cache
+        g.draw_missions(g.tr.WIN)
+    return frame
+
+@bench("garage_draw[400]")
+def _():
+    from data import Profile
+    from garage import Garage
+    g = game(); p = Profile(); p._data = big_profile_data()
+    garage = Garage(types.SimpleNamespace(profile=p, coins=p.coins), g.tr.MID, g.tr.SMALL)
+    def frame():
+        if not garage.view.scroll_by(47): garage.view.scroll = 0
+        garage.draw(g.tr.WIN)
+    return frame
+
+# ---------------- Save data ----------------
+@bench("load_data[400]")
+def _():
+    import data
+    data.write_atomic(data.SAVE_FILE, json.dumps(big_profile_data()))
+    return data.load_data
+
+@bench("profile_save[400]")
+def _():
+    """What the frame thread pays for a change + save: only the dirty field is re-serialized."""
+    from data import Profile
+    p = Profile(); p._data = big_profile_data(); p.to_json()
+    def frame():
+        p.add_coins(1); p.save()
+    return frame
+
+@bench("save_data[400]", scale=0.1)
+def _():
+    """A full save of a large profile through the background writer, flushed to disk."""
+    import data
+    d = big_profile_data()
+    def frame():
+        d["coins"] += 1; data.save_data(d); data.flush_saves()
+    return frame
+
+# ---------------- Runner ----------------
+def measure(setup, frames=FRAMES, repeats=REPEATS, warmup=WARMUP, scale=1.0):
+    frames = max(1, int(frames*scale)); warmup = max(1, int(warmup*scale)); alloc_frames = max(1, int(ALLOC_FRAMES*scale))
+    random.seed(SEED)
+    frame = setup()
+    for _ in range(warmup): frame()
+    runs = []
+    for _ in range(repeats):
+        t = time.perf_counter_ns()
+        for _ in range(frames): frame()
+        runs.append((time.perf_counter_ns() - t) / frames)
+    # allocations in a separate pass: tracing slows everything down
+    tracemalloc.start(); peak = 0
+    blocks = sys.getallocatedblocks()
+    for _ in range(alloc_frames):
+        base = tracemalloc.get_traced_memory()[0]; tracemalloc.reset_peak()
+        frame()
+        peak += tracemalloc.get_traced_memory()[1] - base
+    blocks = (sys.getallocatedblocks() - blocks) / alloc_frames
+    tracemalloc.stop()
+    return dict(ns_per_frame=min(runs), spread=(statistics.median(runs) - min(runs)) / min(runs),
+                kib_per_frame=peak / alloc_frames / 1024, blocks_per_frame=blocks)
+
+def compare(results, baseline, threshold):
+    """Lines describing each benchmark against `baseline`, and whether any regressed."""
+    lines = []; failed = False
+    for name, r in results.items():
+        b = baseline.get(name)
+        if b is None: lines.append(f"{name:28s} (no baseline)"); continue
+        change = r["ns_per_frame"] / b["ns_per_frame"] - 1
+        bad = change > threshold; failed |= bad
+        lines.append(f"{name:28s} {b['ns_per_frame']:12,.0f} -> {r['ns_per_frame']:12,.0f} ns  {change:+7.1%}{'  REGRESSION' if bad else ''}")
+    return lines, failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the game loop's hot paths headless")
+    ap.add_argument("-k", dest="filter", default="", help="only benchmarks whose name contains this")
+    ap.add_argument("--frames", type=int, default=FRAMES)
+    ap.add_argument("--repeats", type=int, default=REPEATS)
+    ap.add_argument("--save", metavar="JSON", help="write results as a baseline")
+    ap.add_argument("--compare", metavar="JSON", help="compare against a baseline; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before failing (default 15%%)")
+    ap.add_argument("--list", action="store_true")
+    args = ap.parse_args(argv)
+    names = [n for n in BENCHES if args.filter in n]
+    if args.list: print("\n".join(names)); return 0
+    save = os.path.abspath(args.save) if args.save else None
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f: baseline = json.load(f)["results"]
+
+    # everything that writes files (profile, history, caches) does so in a scratch dir
+    sys.path.insert(0, HERE); scratch = tempfile.mkdtemp(prefix="traffic-rush-bench-"); os.chdir(scratch)
+    results = {}
+    print(f"{'benchmark':28s} {'ns/frame':>14s} {'frames/s':>10s} {'spread':>7s} {'KiB/frame':>10s} {'blocks/frame':>13s}")
+    for name in names:
+        setup, scale = BENCHES[name]
+        r = results[name] = measure(setup, args.frames, args.repeats, scale=scale)
+        print(f"{name:28s} {r['ns_per_frame']:14,.0f} {1e9/r['ns_per_frame']:10,.0f} {r['spread']:7.1%} {r['kib_per_frame']:10.2f} {r['blocks_per_frame']:13.2f}")
+    if "data" in sys.modules: sys.modules["data"].flush_saves()
+    if "history" in sys.modules: sys.modules["history"].HISTORY.flush()
+    shutil.rmtree(scratch, ignore_errors=True)
+    if save:
+        import platform
+        with open(save, "w") as f:
+            json.dump(dict(machine=platform.platform(), python=platform.python_version(), results=results), f, indent=1)
+        print("baseline written to", save)
+    if baseline is not None:
+        lines, failed = compare(results, baseline, args.threshold)
+        print(); print("\n".join(lines))
+        if failed: print(f"\nFAILED: slower than baseline by more than {args.threshold:.0%}"); return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
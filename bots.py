@@ -0,0 +1,43 @@
+# bots.py
+# Scripted players for headless runs (tuning, mission difficulty estimates).
+# A policy is called with the Simulation before each step and returns the
+# lane deltas to apply that step.
+import random
+from sim import LANES, ENEMY_HEIGHT
+
+class RandomBot:
+    """Changes lane at random, `rate` times per second on average."""
+    def __init__(self, rate=3.0, seed=None):
+        self.p = rate / 60.0; self.rng = random.Random(seed)
+    def __call__(self, sim):
+        return [self.rng.choice((-1, 1))] if self.rng.random() < self.p else []
+
+class DodgeBot:
+    """Looks `lookahead` px up its lane and, when threatened, heads for the lane
+    (reachable without crossing a car alongside) whose nearest car is furthest
+    away. `skill` is the chance per step that it notices a threat at all, so
+    lower skill means later reactions and more crashes."""
+    def __init__(self, lookahead=260, skill=0.35, seed=None):
+        self.lookahead = lookahead; self.skill = skill; self.rng = random.Random(seed)
+
+    def clearance(self, sim, lane):
+        """Distance from the player's top edge to the nearest car above it in `lane`."""
+        p = sim.player
+        cars = sim.lanes.between(lane, p.top - self.lookahead - ENEMY_HEIGHT, p.bottom + ENEMY_HEIGHT/2)
+        if not cars: return float("inf")
+        return p.top - (sim.ents.y[cars[-1]] + ENEMY_HEIGHT/2)
+
+    def __call__(self, sim):
+        lane = sim.player.lane
+        if self.clearance(sim, lane) > self.lookahead or self.rng.random() > self.skill: return []
+        best, best_c = 0, self.clearance(sim, lane)
+        for d in (-1, 1):
+            l = lane + d
+            while 0 <= l < LANES:
+                c = self.clearance(sim, l)
+                if c < 0: break                  # a car alongside: can't pass through this lane
+                if c > best_c: best, best_c = d, c
+                l += d
+        return [best] if best else []
+
+POLICIES = {"random": RandomBot, "dodge": DodgeBot}
@@ -1,7 +1,8 @@
 # data.py
-import json, os
+import json, os, copy, atexit, threading, time
 
 SAVE_FILE = "data.json"
+SAVE_DEBOUNCE = 0.5     # seconds a save request waits for more changes before hitting disk
 
 DEFAULT_DATA = {
     "coins": 0,
@@ -15,13 +16,20 @@ DEFAULT_DATA = {
     },
     "achievements": {
         "coins_100": False,
+        "coins_1000": False,
         "missions_10": False,
-        "distance_5000": False
+        "distance_5000": False,
+        "distance_50000": False,
+        "near_miss_100": False,
+        "combo_10": False
     },
     "stats": {
         "total_coins": 0,
         "missions_played": 0,
-        "distance_total": 0.0
+        "missions_completed": 0,
+        "distance_total": 0.0,
+        "near_misses": 0,
+        "best_combo": 0
     }
 }
 
@@ -31,10 +39,213 @@ def load_data():
             with open(SAVE_FILE, "r") as f:
                 return json.load(f)
         except Exception:
-            pass
+            # keep the unreadable file for inspection instead of overwriting it with defaults
+            try: os.replace(SAVE_FILE, SAVE_FILE + ".bad")
+            except OSError: pass
     save_data(DEFAULT_DATA)
-    return DEFAULT_DATA.copy()
+    return copy.deepcopy(DEFAULT_DATA)
+
+def write_atomic(path, text):
+    """Write to a temp file, fsync, then rename over `path`: readers see either
+    the old file or the new one, never a torn write."""
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+    if hasattr(os, "O_DIRECTORY"):  # make the rename itself durable (POSIX)
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try: os.fsync(fd)
+        finally: os.close(fd)
+
+# ---------------- Background writer ----------------
+class SaveWriter:
+    """Writes save requests on a daemon thread. Requests are serialized on the
+    caller's thread (a cheap snapshot, so later edits to the dict can't race the
+    writer), coalesced per file (only the newest snapshot is written) and held
+    for `debounce` seconds after the first one so bursts become one write."""
+    def __init__(self, debounce=SAVE_DEBOUNCE):
+        self.debounce = debounce
+        self.pending = {}       # path -> newest json text
+        self.due = None         # monotonic time the pending batch should be written
+        self.busy = False
+        self.writes = 0; self.requests = 0; self.error = None
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="save-writer", daemon=True)
+        self.thread.start()
+
+    def request(self, data, path=None):
+        self.request_text(json.dumps(data, indent=2), path)
+
+    def request_text(self, text, path=None):
+        with self.cond:
+            self.pending[path or SAVE_FILE] = text; self.requests += 1
+            if self.due is None: self.due = time.monotonic() + self.debounce
+            self.cond.notify()
+
+    def flush(self, timeout=5.0):
+        """Write anything pending now and wait for it to land. Returns True if
+        everything was written within `timeout`."""
+        end = time.monotonic() + timeout
+        with self.cond:
+            if self.pending: self.due = 0; self.cond.notify_all()
+            while self.pending or self.busy:
+                left = end - time.monotonic()
+                if left <= 0: return False
+                self.cond.wait(left)
+        return True
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending or time.monotonic() < self.due:
+                    self.cond.wait(None if not self.pending else max(0.0, self.due - time.monotonic()))
+                batch = self.pending; self.pending = {}; self.due = None; self.busy = True
+            for path, text in batch.items():
+                try:
+                    write_atomic(path, text); self.writes += 1; self.error = None
+                except OSError as e:
+                    # keep it for the next attempt unless a newer snapshot already replaced it
+                    self.error = e
+                    with self.cond:
+                        self.pending.setdefault(path, text)
+                        if self.due is None: self.due = time.monotonic() + self.debounce
+            with self.cond:
+                self.busy = False; self.cond.notify_all()
+
+_writer = None
+
+def save_writer():
+    global _writer
+    if _writer is None:
+        _writer = SaveWriter(); atexit.register(_writer.flush)
+    return _writer
 
 def save_data(data):
-    with open(SAVE_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    """Queue `data` to be written to SAVE_FILE in the background."""
+    save_writer().request(data)
+
+def flush_saves(timeout=5.0):
+    """Block until queued saves are on disk (call before exiting)."""
+    return _writer.flush(timeout) if _writer else True
+
+# ---------------- Profile store ----------------
+def _fill_defaults(data, defaults):
+    """Add keys missing from an older save, recursively, without touching existing ones."""
+    for k, v in defaults.items():
+        if k not in data: data[k] = copy.deepcopy(v)
+        elif isinstance(v, dict) and isinstance(data[k], dict): _fill_defaults(data[k], v)
+    return data
+
+class Profile:
+    """The one in-memory copy of the player's save. Loaded on first access;
+    everything that reads or changes player data goes through here. Changes
+    mark their top-level field dirty and notify subscribers with the field
+    name; save() re-serializes only dirty fields and queues the file on the
+    background writer."""
+    def __init__(self, path=None):
+        self.path = path
+        self._data = None
+        self._dirty = set()
+        self._parts = {}        # field -> cached JSON text for clean fields
+        self._listeners = []
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = _fill_defaults(load_data(), DEFAULT_DATA)
+        return self._data
+
+    def subscribe(self, fn):
+        """fn(field) is called after every change."""
+        self._listeners.append(fn)
+
+    def unsubscribe(self, fn):
+        if fn in self._listeners: self._listeners.remove(fn)
+
+    def touch(self, field):
+        """Mark a field changed (after editing a nested dict in place)."""
+        self._dirty.add(field); self._parts.pop(field, None)
+        for fn in self._listeners: fn(field)
+
+    def set(self, field, value):
+        if self.data.get(field) != value:
+            self.data[field] = value; self.touch(field)
+
+    @property
+    def dirty(self):
+        return frozenset(self._dirty)
+
+    # ---- typed accessors ----
+    @property
+    def coins(self): return int(self.data["coins"])
+    @coins.setter
+    def coins(self, n): self.set("coins", int(n))
+
+    @property
+    def xp(self): return int(self.data["xp"])
+    @property
+    def level(self): return int(self.data["level"])
+
+    @property
+    def selected_vehicle(self): return str(self.data["selected_vehicle"])
+    @selected_vehicle.setter
+    def selected_vehicle(self, name):
+        if name not in self.data["vehicles"]: raise KeyError(name)
+        self.set("selected_vehicle", name)
+
+    def add_coins(self, n=1):
+        self.coins = self.coins + n
+
+    def spend(self, cost):
+        """Deduct `cost` coins if affordable; returns whether it was."""
+        if self.coins < cost: return False
+        self.coins = self.coins - cost
+        return True
+
+    def vehicle_names(self):
+        return list(self.data["vehicles"])
+
+    def vehicle(self, name):
+        """Read-only view; change vehicles with set_vehicle_stat/unlock_vehicle."""
+        return self.data["vehicles"][name]
+
+    def set_vehicle_stat(self, name, stat, value):
+        v = self.data["vehicles"][name]
+        if v.get(stat) != value: v[stat] = value; self.touch("vehicles")
+
+    def unlock_vehicle(self, name):
+        self.set_vehicle_stat(name, "unlocked", True)
+
+    def stat(self, name, default=0):
+        return self.data["stats"].get(name, default)
+
+    def add_stat(self, name, delta):
+        st = self.data["stats"]; st[name] = st.get(name, 0) + delta; self.touch("stats")
+
+    def achievement(self, name):
+        return bool(self.data["achievements"].get(name, False))
+
+    def unlock_achievement(self, name):
+        a = self.data["achievements"]
+        if not a.get(name): a[name] = True; self.touch("achievements")
+
+    # ---- persistence ----
+    def to_json(self):
+        """Same layout as json.dump(data, indent=2), built from per-field pieces so
+        only the fields changed since the last save are re-encoded."""
+        parts = []
+        for k, v in self.data.items():
+            text = self._parts.get(k)
+            if text is None:
+                text = self._parts[k] = json.dumps(k) + ": " + json.dumps(v, indent=2).replace("\n", "\n  ")
+            parts.append("  " + text)
+        return "{\n" + ",\n".join(parts) + "\n}" if parts else "{}"
+
+    def save(self):
+        """Queue a write if anything changed since the last save."""
+        if not self._dirty: return False
+        save_writer().request_text(self.to_json(), self.path)
+        self._dirty.clear()
+        return True
+
+PROFILE = Profile()
@@ -0,0 +1,167 @@
+# entities.py
+# Struct-of-arrays store for every moving entity (enemies, coins, powerups).
+# Columns are preallocated NumPy arrays; dead slots go on a free list and are
+# reused, so spawning and culling never allocate per frame.
+import numpy as np
+from lane_index import LaneIndex, EARLY
+
+KIND_ENEMY, KIND_COIN, KIND_POWERUP = 0, 1, 2
+
+F_NEAR_MISS = 1
+
+# Dead slots are parked far above the road with zero speed so the vector ops
+# never need to mask them out.
+PARK_Y = -1e9
+
+# x/y, prev_x/prev_y and the half extents are rows of (2, capacity) arrays, so
+# snapshots, interpolation and the overlap test handle both axes in one op.
+STACKED = ("pos", "prev", "half")
+COLUMNS = STACKED + ("w", "h", "speed_factor", "lane", "kind", "variant", "flags", "alive", "color")
+EMPTY = np.zeros(0, np.intp)
+
+# Below this many slots a plain Python pass beats the fixed cost of the NumPy
+# calls (about 50 slots on a desktop CPU; normal traffic uses 10-20).
+SCALAR_MAX = 32
+
+class EntityStore:
+    def __init__(self, capacity=64, lanes=0, indexed=(KIND_ENEMY,)):
+        self.capacity = 0
+        self._alloc(capacity)
+        self.lane_index = LaneIndex(self, lanes, indexed) if lanes else None
+        self.clear()
+
+    def _alloc(self, cap):
+        self.pos = np.zeros((2, cap)); self.pos[1] = PARK_Y; self.x, self.y = self.pos
+        self.prev = self.pos.copy(); self.prev_x, self.prev_y = self.prev      # positions at the start of the step
+        self.half = np.zeros((2, cap))                                          # w/2, h/2
+        self.w = np.zeros(cap); self.h = np.zeros(cap)
+        self.speed_factor = np.zeros(cap)
+        self.lane = np.zeros(cap, np.int16)
+        self.kind = np.zeros(cap, np.uint8)
+        self.variant = np.zeros(cap, np.uint8)
+        self.flags = np.zeros(cap, np.uint8)
+        self.alive = np.zeros(cap, bool)
+        self.color = np.zeros((cap, 3), np.uint8)
+        # scratch buffers reused by the vector ops
+        self._f0 = np.zeros(cap)
+        self._f2 = np.zeros((2, cap)); self._reach = np.zeros((2, cap)); self._l2 = np.zeros((2, cap)); self._b2 = np.zeros((2, cap), bool)
+        self._b0 = np.zeros(cap, bool)
+        self._box = np.zeros((2, 2, 1))       # overlaps(): query centre and half extents, broadcast over slots
+        self.capacity = cap
+
+    def _grow(self):
+        n = self.capacity
+        old = {name: getattr(self, name) for name in COLUMNS}
+        self._alloc(n*2)
+        for name, arr in old.items():
+            if name in STACKED: getattr(self, name)[:, :n] = arr
+            else: getattr(self, name)[:n] = arr
+
+    def clear(self):
+        self.alive[:] = False; self.y[:] = PARK_Y; self.speed_factor[:] = 0.0
+        self.hi = 0  # high-water mark: every live slot is < hi
+        self.count = 0
+        self.free = []
+        self.scroll = 0.0                       # total dy passed to move()
+        self._cull_limit = None; self._cull_at = -np.inf   # scroll at which cull(limit) next has work
+        if self.lane_index: self.lane_index.clear()
+
+    # ---- lifecycle ----
+    def spawn(self, kind, lane, x, y, w, h, speed_factor=1.0, variant=0, color=(0,0,0)):
+        if self.free: i = self.free.pop()
+        else:
+            if self.hi == self.capacity: self._grow()
+            i = self.hi; self.hi += 1
+        self.kind[i] = kind; self.lane[i] = lane
+        self.x[i] = self.prev_x[i] = x; self.y[i] = self.prev_y[i] = y; self.w[i] = w; self.h[i] = h
+        self.half[0, i] = w/2; self.half[1, i] = h/2
+        if self._cull_limit is not None and speed_factor > 0:
+            self._cull_at = min(self._cull_at, self.scroll + (self._cull_limit - (y - h/2)) / speed_factor - EARLY)
+        self.speed_factor[i] = speed_factor; self.variant[i] = variant; self.color[i] = color
+        self.flags[i] = 0; self.alive[i] = True
+        self.count += 1
+        if self.lane_index and kind in self.lane_index.kinds: self.lane_index.add(i, lane)
+        return i
+
+    def kill(self, i):
+        if self.alive[i]:
+            i = int(i)
+            if self.lane_index and self.kind[i] in self.lane_index.kinds: self.lane_index.remove(i, self.lane[i])
+            self.alive[i] = False; self.y[i] = PARK_Y; self.speed_factor[i] = 0.0
+            self.free.append(i); self.count -= 1
+
+    def kill_many(self, idx):
+        for i in idx: self.kill(i)
+
+    def alive_mask(self, kind=None):
+        n = self.hi
+        if kind is None: return self.alive[:n]
+        m = np.equal(self.kind[:n], kind, out=self._b0[:n]); m &= self.alive[:n]
+        return m
+
+    def indices(self, kind=None):
+        return self.alive_mask(kind).nonzero()[0]
+
+    # ---- vector ops over all live entities ----
+    def snapshot(self):
+        """Remember current positions so renderers can interpolate into the next step."""
+        n = self.hi
+        np.copyto(self.prev[:, :n], self.pos[:, :n])
+
+    def lerp(self, alpha):
+        """Positions blended `alpha` of the way from the last snapshot to now.
+        Returns scratch arrays valid until the next call."""
+        n = self.hi; l = self._l2[:, :n]
+        np.subtract(self.pos[:, :n], self.prev[:, :n], out=l); l *= alpha; l += self.prev[:, :n]
+        return l[0], l[1]
+
+    def move(self, dy):
+        """Scroll every entity down by dy scaled by its speed factor."""
+        n = self.hi
+        np.multiply(self.speed_factor[:n], dy, out=self._f0[:n]); self.y[:n] += self._f0[:n]
+        self.scroll += dy
+        if self.lane_index: self.lane_index.moved(dy)
+
+    def cull(self, limit):
+        """Free every entity whose top edge passed `limit`. Returns the freed slots.
+        Entities only move by speed_factor * dy, so the scroll at which the next one
+        crosses is known; until then this is a single comparison."""
+        if limit == self._cull_limit and self.scroll < self._cull_at: return EMPTY
+        n = self.hi
+        f0 = np.subtract(self.y[:n], self.half[1, :n], out=self._f0[:n])
+        idx = np.greater(f0, limit, out=self._b0[:n]).nonzero()[0]
+        self.kill_many(idx)
+        sf = self.speed_factor[:n]; live = sf > 0               # dead slots have speed 0
+        self._cull_limit = limit
+        self._cull_at = self.scroll + ((limit - f0[live]) / sf[live]).min() - EARLY if live.any() else np.inf
+        return idx
+
+    def overlaps(self, x, y, w, h):
+        """Indices of live entities (any kind) whose AABB overlaps the given box
+        (a list while the store is small, else an index array)."""
+        n = self.hi
+        if n <= SCALAR_MAX:
+            hh = h/2
+            hits = [i for i, (ey, eh) in enumerate(zip(self.y[:n].tolist(), self.half[1, :n].tolist())) if abs(ey - y) < eh + hh]
+            if hits:
+                hw = w/2; xs = self.x; ew = self.half[0]
+                hits = [i for i in hits if abs(xs[i] - x) < ew[i] + hw]
+            return hits
+        box = self._box
+        box[0, 0, 0] = x; box[0, 1, 0] = y; box[1, 0, 0] = w/2; box[1, 1, 0] = h/2
+        d = np.subtract(self.pos[:, :n], box[0], out=self._f2[:, :n]); np.abs(d, out=d)
+        reach = np.add(self.half[:, :n], box[1], out=self._reach[:, :n])
+        b = np.less(d, reach, out=self._b2[:, :n])
+        return np.logical_and(b[0], b[1], out=self._b0[:n]).nonzero()[0]
+
+    def attract(self, kind, px, py, pull, radius):
+        """Pull live entities of `kind` within `radius` of (px,py) toward it by `pull` px."""
+        n = self.hi; m = self.alive_mask(kind)
+        dx = px - self.x[:n]; dy = py - self.y[:n]
+        dist = np.hypot(dx, dy)
+        m &= (dist > 1) & (dist < radius)
+        if m.any():
+            s = pull / dist[m]
+            self.x[:n][m] += dx[m]*s; self.y[:n][m] += dy[m]*s
+            self._cull_at = -np.inf
+            if self.lane_index and kind in self.lane_index.kinds: self.lane_index.invalidate()
@@ -1,108 +1,108 @@
 import pygame
-from ui import Buttons, BTN_BG, BTN_HL, TEXT
-from data import load_data, save_data
+from ui import Buttons, ListView, BTN_BG, BTN_HL, TEXT
+from render_cache import TEXT_CACHE
+from assets import ASSETS
+from sim import WIDTH, HEIGHT
 
 PANEL_BG = (40,40,50)
 UNLOCK_PRICE = 100
 UPGRADE_PRICE_BASE = 100
 
+# vehicle card layout (single column, scrollable) and the buy/select button inside a card
+CARD_X, CARD_Y, CARD_H, CARD_GAP = 60, 120, 110, 30
+CARD_BTN = pygame.Rect(WIDTH - 2*CARD_X - 140, CARD_H - 36, 120, 28)
+
 class Garage:
     def __init__(self, game, mid_font, small_font):
         self.game = game  
-        self.data = load_data()
-        self.vehicles = self.data["vehicles"]
-        self.names = list(self.vehicles.keys())
-        if self.data.get("selected_vehicle") not in self.names:
-            self.data["selected_vehicle"] = self.names[0]
-        self.index = self.names.index(self.data["selected_vehicle"])
+        self.profile = game.profile
+        self.names = self.profile.vehicle_names()
+        if self.profile.data.get("selected_vehicle") not in self.names:
+            self.profile.selected_vehicle = self.names[0]
+        self.index = self.names.index(self.profile.selected_vehicle)
+        self.profile.subscribe(self.on_profile_change)
         self.mid_font = mid_font 
         self.small_font = small_font
         self.buttons = [
             Buttons(100, 100, 200, 50, "Upgrade", self.mid_font),
             Buttons(100, 200, 200, 50, "Back", self.small_font),
         ]
-        self.scroll = 0
+        self.view = ListView((CARD_X, CARD_Y, WIDTH - 2*CARD_X, HEIGHT - CARD_Y - 50), CARD_H, CARD_GAP, self.draw_card)
+        self.view.set_items(self.names); self.view.selected = self.index
+        self.dirty = True  # cleared by draw(); set whenever the screen content changes
+
+    def on_profile_change(self, field):
+        if field == "vehicles": self.view.invalidate()
+        if field in ("coins", "vehicles", "selected_vehicle"): self.dirty = True
+
+    def draw_card(self, card, name, i, hover, selected):
+        rect = card.get_rect()
+        pygame.draw.rect(card, BTN_HL if selected else BTN_BG, rect, border_radius=12)
+        pygame.draw.rect(card, (0,0,0), rect, 2, border_radius=12)
+        # title
+        card.blit(TEXT_CACHE.render(self.mid_font, name.upper(), TEXT), (14, 8))
+        # stats
+        v = self.profile.vehicle(name)
+        stat_line = f"ACC {v['acceleration']}  |  SPD {v['speed']}  |  MAG {v['magnet']}  |  DUR {v['duration']}"
+        card.blit(TEXT_CACHE.render(self.small_font, stat_line, (220,220,220)), (14, 44))
+        # buttons
+        btn = CARD_BTN
+        if v["unlocked"]:
+            pygame.draw.rect(card, (70,200,70), btn, border_radius=6)
+            card.blit(TEXT_CACHE.render(self.small_font, "Select", (0,0,0)), (btn.centerx-20, btn.centery-9))
+        else:
+            pygame.draw.rect(card, (200,70,70), btn, border_radius=6)
+            card.blit(TEXT_CACHE.render(self.small_font, f"Buy ({UNLOCK_PRICE})", (0,0,0)), (btn.centerx-36, btn.centery-9))
 
     def draw(self, surf):
+        self.dirty = False
         surf.fill(PANEL_BG)
         def draw_centered(t, y, f=None, c=TEXT):
             font_to_use = f if f is not None else self.mid_font
             if font_to_use is None:
-                font_to_use = pygame.font.SysFont("arial", 18)
-            surf.blit(font_to_use.render(t, True, c), ((surf.get_width() - font_to_use.size(t)[0]) // 2, y))
+                font_to_use = ASSETS.font("arial", 18)
+            text = TEXT_CACHE.render(font_to_use, t, c)
+            surf.blit(text, ((surf.get_width() - text.get_width()) // 2, y))
         draw_centered("GARAGE", 30, None, TEXT)
         
         # coin display
         coin_text = f"Coins: {self.game.coins}"
-        sf = self.small_font or pygame.font.SysFont("arial", 16)
-        surf.blit(sf.render(coin_text, True, (255,215,0)), (16, 18))
+        sf = self.small_font or ASSETS.font("arial", 16)
+        TEXT_CACHE.blit(surf, sf, coin_text, (255,215,0), (16, 18), split_digits=True)
 
-        # vehicle list (single column)
-        start_y = 120
-        gap = 140
-        for i, name in enumerate(self.names):
-            y = start_y + i*gap - self.scroll
-            rect = pygame.Rect(60, y, surf.get_width()-120, 110)
-            pygame.draw.rect(surf, BTN_HL if i==self.index else BTN_BG, rect, border_radius=12)
-            pygame.draw.rect(surf, (0,0,0), rect, 2, border_radius=12)
-            
-            # title
-            mf = self.mid_font or pygame.font.SysFont("arial", 20, bold=True)
-            surf.blit(mf.render(name.upper(), True, TEXT), (rect.x+14, rect.y+8))
-           
-            # stats
-            v = self.vehicles[name]
-            stat_line = f"ACC {v['acceleration']}  |  SPD {v['speed']}  |  MAG {v['magnet']}  |  DUR {v['duration']}"
-            sf2 = self.small_font or pygame.font.SysFont("arial", 16)
-            surf.blit(sf2.render(stat_line, True, (220,220,220)), (rect.x+14, rect.y+44))
-            
-            # buttons
-            btn_rect = pygame.Rect(rect.right-140, rect.bottom-36, 120, 28)
-            if v["unlocked"]:
-                pygame.draw.rect(surf, (70,200,70), btn_rect, border_radius=6)
-                surf.blit(sf2.render("Select", True, (0,0,0)), (btn_rect.centerx-20, btn_rect.centery-9))
-            else:
-                pygame.draw.rect(surf, (200,70,70), btn_rect, border_radius=6)
-                surf.blit(sf2.render(f"Buy ({UNLOCK_PRICE})", True, (0,0,0)), (btn_rect.centerx-36, btn_rect.centery-9))
+        self.view.draw(surf)
 
         # game instructions
-        surf.blit(sf2.render("Click green to select, red to buy. Use Up/Down to scroll. Esc to return.", True, (200,200,200)), (24, surf.get_height()-36))
+        surf.blit(TEXT_CACHE.render(sf, "Click green to select, red to buy. Use Up/Down to scroll. Esc to return.", (200,200,200)), (24, surf.get_height()-36))
 
     def click_at(self, pos):
-        x,y = pos
-        start_y = 120
-        gap = 140
-        for i, name in enumerate(self.names):
-            rect = pygame.Rect(60, start_y + i*gap - self.scroll, 360, 110)
-            btn_rect = pygame.Rect(rect.right-140, rect.bottom-36, 120, 28)
-            if btn_rect.collidepoint(x,y):
-                vehicle = self.vehicles[name]
-                if vehicle["unlocked"]:
-                    self.data["selected_vehicle"] = name
-                    self.game.selected_vehicle = name
-                else:
-                    # in-game purchases
-                    if self.game.coins >= UNLOCK_PRICE:
-                        self.game.coins -= UNLOCK_PRICE
-                        vehicle["unlocked"] = True
-                        self.save()
-                return
+        i = self.view.item_at(pos)
+        if i < 0: return
+        card = self.view.rect_of(i)
+        if not CARD_BTN.collidepoint(pos[0] - card.x, pos[1] - card.y): return
+        name = self.names[i]
+        self.dirty = True
+        if self.profile.vehicle(name)["unlocked"]:
+            self.profile.selected_vehicle = name
+            self.index = self.view.selected = i
+            self.save()
+        else:
+            # in-game purchases
+            if self.profile.spend(UNLOCK_PRICE):
+                self.profile.unlock_vehicle(name)
+                self.save()
 
     def upgrade(self, name, stat):
-        vehicle = self.vehicles.get(name)
-        if not vehicle: return False
-        cost = UPGRADE_PRICE_BASE * (vehicle[stat] + 1)
-        if self.game.coins >= cost:
-            self.game.coins -= cost
-            vehicle[stat] += 1
+        if name not in self.names: return False
+        level = self.profile.vehicle(name)[stat]
+        if self.profile.spend(UPGRADE_PRICE_BASE * (level + 1)):
+            self.profile.set_vehicle_stat(name, stat, level + 1)
             self.save()
             return True
         return False
 
     def scroll_by(self, dy):
-        self.scroll = max(0, self.scroll + dy)
+        if self.view.scroll_by(dy): self.dirty = True
 
     def save(self):
-        self.data["coins"] = self.game.coins
-        self.data["selected_vehicle"] = self.game.selected_vehicle
-        save_data(self.data)
+        self.profile.save()
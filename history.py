@@ -0,0 +1,190 @@
+# history.py
+# Append-only log of finished runs and completed missions in SQLite. Rows are
+# inserted on a background thread (so a slow disk never stalls a frame) and
+# every query is answered from indexes by SQLite itself, so the history is
+# never loaded into memory no matter how long it grows.
+import sqlite3, threading, queue, time, math
+
+HISTORY_FILE = "history.db"
+
+OUT_CRASH = "crash"      # a run that ended
+OUT_MISSION = "mission"  # a mission completed during a run (the run goes on)
+BUSY_TIMEOUT = 1.0       # seconds the writer waits on a locked database before retrying later
+RETRY_DELAY = 2.0
+
+FIELDS = ("ts", "outcome", "diff", "vehicle", "score", "elapsed", "coins", "combo", "missions", "mission", "seed", "replay")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id       INTEGER PRIMARY KEY,
+    ts       REAL    NOT NULL,
+    outcome  TEXT    NOT NULL,
+    diff     TEXT    NOT NULL,
+    vehicle  TEXT    NOT NULL,
+    score    INTEGER NOT NULL,
+    elapsed  REAL    NOT NULL,
+    coins    INTEGER NOT NULL,
+    combo    INTEGER NOT NULL,
+    missions INTEGER NOT NULL DEFAULT 0,
+    mission  TEXT,
+    seed     INTEGER,
+    replay   BLOB
+);
+CREATE INDEX IF NOT EXISTS runs_best ON runs (outcome, diff, vehicle, score);
+CREATE INDEX IF NOT EXISTS runs_best_diff ON runs (outcome, diff, score);
+CREATE INDEX IF NOT EXISTS runs_best_any ON runs (outcome, score);
+CREATE INDEX IF NOT EXISTS runs_recent ON runs (outcome, diff, id);
+CREATE INDEX IF NOT EXISTS runs_recent_any ON runs (outcome, id);
+"""
+
+# stat columns queries may aggregate over (never interpolated from user input)
+STAT_COLUMNS = ("score", "elapsed", "coins", "combo")
+
+def _where(outcome, diff, vehicle):
+    sql = ["outcome = ?"]; args = [outcome]
+    if diff is not None: sql.append("diff = ?"); args.append(diff)
+    if vehicle is not None: sql.append("vehicle = ?"); args.append(vehicle)
+    return " AND ".join(sql), args
+
+def _column(name):
+    if name not in STAT_COLUMNS: raise ValueError(f"unknown stat column {name!r}")
+    return name
+
+class RunHistory:
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self._queue = queue.Queue()
+        self._writer = None
+        self._db = None        # read connection, game thread only
+        self.appended = 0
+        self.waiting = 0       # rows the writer couldn't commit yet (locked or full disk); it keeps retrying
+        self.error = None
+        self.bests = {}        # (diff, vehicle) -> best crash score: loaded by the writer, kept current by append()
+        self._bests_lock = threading.Lock()
+
+    def _connect(self, timeout=5.0):
+        db = sqlite3.connect(self.path, timeout=timeout)
+        db.execute("PRAGMA journal_mode=WAL")      # readers don't block the writer
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    @property
+    def db(self):
+        if self._db is None: self._db = self._connect()
+        return self._db
+
+    # ---- writing ----
+    def append(self, outcome, sim, mission=None, replay=None):
+        """Queue one row for `sim`'s current state. Never blocks."""
+        row = (time.time(), outcome, sim.diff, sim.vehicle_id, int(sim.score), round(sim.elapsed, 3),
+               sim.coins_collected, sim.near_miss_combo, sum(m.completed for m in sim.missions),
+               mission, sim.seed, replay)
+        if outcome == OUT_CRASH: self._note_best(sim.diff, sim.vehicle_id, row[4])
+        self._start(); self._queue.put(row)
+
+    def _note_best(self, diff, vehicle, score):
+        with self._bests_lock:
+            if score > self.bests.get((diff, vehicle), 0): self.bests[(diff, vehicle)] = score
+
+    def load_bests(self):
+        """Start the writer early so it fills `bests` from disk off the frame thread."""
+        self._start()
+
+    def cached_best(self, diff, vehicle):
+        """best(diff, vehicle) without touching SQLite: safe on the frame thread, and 0 until
+        loaded (or if history.db can't be read)."""
+        return self.bests.get((diff, vehicle), 0)
+
+    def _start(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._run, name="history-writer", daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        db = None; pending = []
+        insert = f"INSERT INTO runs ({', '.join(FIELDS)}) VALUES ({', '.join('?'*len(FIELDS))})"
+        try:
+            db = self._connect(BUSY_TIMEOUT)
+            for (diff, vehicle), best in self.best_table(db=db).items(): self._note_best(diff, vehicle, best)
+        except sqlite3.Error as e:
+            self.error = str(e)
+            if db is not None: db.close(); db = None
+        while True:
+            try: batch = [self._queue.get(timeout=RETRY_DELAY if pending else None)]
+            except queue.Empty: batch = []
+            while True:                        # drain whatever queued up meanwhile
+                try: batch.append(self._queue.get_nowait())
+                except queue.Empty: break
+            pending += [r for r in batch if not isinstance(r, threading.Event)]
+            if pending:
+                try:
+                    if db is None: db = self._connect(BUSY_TIMEOUT)
+                    with db: db.executemany(insert, pending)
+                    self.appended += len(pending); pending = []; self.error = None
+                except sqlite3.Error as e:     # keep the rows and try again in RETRY_DELAY
+                    self.error = str(e)
+                    if db is not None: db.close(); db = None
+            self.waiting = len(pending)
+            for r in batch:
+                if isinstance(r, threading.Event): r.set()
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued row is committed; False if some couldn't be (see `error`)."""
+        if self._writer is None: return True
+        self._start()
+        done = threading.Event(); self._queue.put(done)
+        return done.wait(timeout) and not self.waiting
+
+    # ---- queries ----
+    def count(self, diff=None, vehicle=None, outcome=OUT_CRASH):
+        where, args = _where(outcome, diff, vehicle)
+        return self.db.execute(f"SELECT COUNT(*) FROM runs WHERE {where}", args).fetchone()[0]
+
+    def best(self, diff=None, vehicle=None, column="score", outcome=OUT_CRASH):
+        """Highest value of `column` (0 when there are no runs)."""
+        where, args = _where(outcome, diff, vehicle)
+        v = self.db.execute(f"SELECT MAX({_column(column)}) FROM runs WHERE {where}", args).fetchone()[0]
+        return v or 0
+
+    def best_table(self, column="score", outcome=OUT_CRASH, db=None):
+        """{(diff, vehicle): best} for every combination played."""
+        rows = (db or self.db).execute(f"SELECT diff, vehicle, MAX({_column(column)}) FROM runs WHERE outcome = ? "
+                               "GROUP BY diff, vehicle", (outcome,))
+        return {(d, v): b for d, v, b in rows}
+
+    def rolling_average(self, n=20, diff=None, vehicle=None, column="score", outcome=OUT_CRASH):
+        """Mean of `column` over the last `n` runs."""
+        where, args = _where(outcome, diff, vehicle)
+        v = self.db.execute(f"SELECT AVG(v) FROM (SELECT {_column(column)} AS v FROM runs WHERE {where} "
+                            "ORDER BY id DESC LIMIT ?)", args + [n]).fetchone()[0]
+        return v or 0.0
+
+    def percentile(self, q, diff=None, vehicle=None, column="score", outcome=OUT_CRASH):
+        """Nearest-rank q-th percentile (0..100) of `column`; walks the index, not the table."""
+        where, args = _where(outcome, diff, vehicle)
+        n = self.count(diff, vehicle, outcome)
+        if not n: return 0
+        k = min(n - 1, max(0, math.ceil(q / 100.0 * n) - 1))
+        col = _column(column)
+        return self.db.execute(f"SELECT {col} FROM runs WHERE {where} ORDER BY {col} LIMIT 1 OFFSET ?",
+                               args + [k]).fetchone()[0]
+
+    def distribution(self, qs=(10, 25, 50, 75, 90, 99), **kw):
+        return {q: self.percentile(q, **kw) for q in qs}
+
+    def rank(self, score, diff=None, vehicle=None, outcome=OUT_CRASH):
+        """Fraction of logged runs that `score` beats."""
+        where, args = _where(outcome, diff, vehicle)
+        n = self.count(diff, vehicle, outcome)
+        if not n: return 1.0
+        below = self.db.execute(f"SELECT COUNT(*) FROM runs WHERE {where} AND score < ?", args + [score]).fetchone()[0]
+        return below / n
+
+    def recent(self, n=10, diff=None, vehicle=None, outcome=OUT_CRASH):
+        where, args = _where(outcome, diff, vehicle)
+        cur = self.db.execute(f"SELECT {', '.join(FIELDS[:-1])} FROM runs WHERE {where} ORDER BY id DESC LIMIT ?",
+                              args + [n])
+        return [dict(zip(FIELDS, r)) for r in cur]
+
+HISTORY = RunHistory()
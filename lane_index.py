@@ -0,0 +1,78 @@
+# lane_index.py
+# Per-lane index over an EntityStore, each lane holding slot ids ordered by y
+# (topmost first). Everything in the store scrolls by speed_factor * dy, so two
+# neighbours in a lane can only swap when the faster one closes the gap to the
+# one ahead, at a scroll distance known in advance. Each lane keeps the scroll
+# at which its next overtake can happen; moved() only adds up the scroll, and a
+# lane is re-checked (and re-sorted) only once that point is passed. In between
+# topmost() is O(1) and between() O(log k).
+from bisect import insort, bisect_left, bisect_right
+import numpy as np
+
+INF = float("inf")
+EARLY = 1e-3      # re-check this much scroll before a predicted crossing, so rounding can't skip one
+
+class LaneIndex:
+    def __init__(self, store, lanes, kinds):
+        self.store = store
+        self.kinds = frozenset(kinds)
+        self.lanes = [[] for _ in range(lanes)]
+        self.scroll = 0.0             # total dy passed to moved()
+        self._next = [INF]*lanes      # scroll at which each lane's order may change; -INF: re-check now
+
+    def clear(self):
+        for lst in self.lanes: lst.clear()
+        self.scroll = 0.0; self._next = [INF]*len(self.lanes)
+
+    # ---- updates (called by the store) ----
+    def add(self, i, lane):
+        insort(self.lanes[lane], i, key=self.store.y.__getitem__)
+        self._next[lane] = -INF       # new neighbours, new overtakes
+
+    def remove(self, i, lane):
+        self.lanes[lane].remove(i)    # can only put the next overtake later: the old estimate stays safe
+
+    def moved(self, dy):
+        self.scroll += dy
+
+    def invalidate(self):
+        """Entities moved some other way than moved(): re-check every lane."""
+        self._next = [-INF]*len(self.lanes)
+
+    def _lane(self, lane):
+        """Slot list for `lane`, sorted by y."""
+        lst = self.lanes[lane]
+        if self.scroll >= self._next[lane]:
+            if len(lst) > 1:
+                s = self.store; ys = s.y[lst]
+                if (ys[1:] < ys[:-1]).any():
+                    order = np.argsort(ys, kind="stable")
+                    lst[:] = [lst[j] for j in order]; ys = ys[order]
+                sf = s.speed_factor[lst]
+                closing = sf[:-1] - sf[1:]      # how fast each car gains on the one below it
+                m = closing > 0
+                self._next[lane] = self.scroll + ((ys[1:][m] - ys[:-1][m]) / closing[m]).min() - EARLY if m.any() else INF
+            else:
+                self._next[lane] = INF
+        return lst
+
+    # ---- queries ----
+    def count(self, lane): return len(self.lanes[lane])
+
+    def topmost(self, lane):
+        """Slot of the highest (smallest y) entity in `lane`, or None."""
+        lst = self._lane(lane)
+        return lst[0] if lst else None
+
+    def between(self, lane, y0, y1):
+        """Slots in `lane` whose centre y lies in the open interval (y0, y1)."""
+        if not self.lanes[lane]: return []
+        lst = self._lane(lane); key = self.store.y.__getitem__
+        return lst[bisect_right(lst, y0, key=key):bisect_left(lst, y1, key=key)]
+
+    def gap_clear(self, lane, gap):
+        """True when a new entity can spawn in `lane`: the topmost one has moved
+        at least one car length plus `gap` down the road."""
+        i = self.topmost(lane)
+        if i is None: return True
+        return self.store.y[i] - self.store.h[i] > gap
@@ -0,0 +1,203 @@
+# leaderboard.py
+# Client for the online leaderboard. submit() only drops the run on an
+# in-memory queue; a background thread persists it to a small SQLite queue
+# (so the backlog survives restarts and offline play) and uploads it in
+# batches over one reused keep-alive HTTP connection, backing off
+# exponentially while the service is unreachable. Every run carries a client
+# generated id, so a batch resent after a lost response is not double counted.
+#
+# The service URL comes from $TRAFFIC_RUSH_LEADERBOARD (default: a local
+# leaderboard_server.py). Protocol: POST /api/v1/scores {"runs": [...]}
+# -> 200 {"accepted": [ids]}.
+import hashlib, http.client, json, os, queue, random, sqlite3, threading, time, uuid
+from urllib.parse import urlsplit
+
+QUEUE_FILE = "leaderboard.db"
+DEFAULT_URL = "http://127.0.0.1:8765"
+SCORES_PATH = "/api/v1/scores"
+BATCH = 50
+MAX_BACKLOG = 20000         # oldest runs are dropped beyond this many waiting
+TIMEOUT = 5.0               # seconds per request
+BUSY_TIMEOUT = 1.0          # seconds to wait on a queue file locked by another instance
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+REJECTED = (400, 413, 422)  # statuses that refuse the records themselves; runs refused on their own are dropped
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending (
+    id      INTEGER PRIMARY KEY,
+    run_id  TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+_STOP = object()
+
+class UploadError(Exception):
+    """A batch the service refused for good (one of REJECTED); resending it as is would not help."""
+
+def run_record(sim, replay=None):
+    """The leaderboard's view of a finished run."""
+    return dict(id=uuid.uuid4().hex, ts=round(time.time(), 3), score=int(sim.score), elapsed=round(sim.elapsed, 3),
+                coins=sim.coins_collected, combo=sim.near_miss_combo, diff=sim.diff, vehicle=sim.vehicle_id,
+                replay_sha256=hashlib.sha256(replay).hexdigest() if replay else None)
+
+class LeaderboardClient:
+    def __init__(self, url=None, path=QUEUE_FILE):
+        self.url = url or os.environ.get("TRAFFIC_RUSH_LEADERBOARD", DEFAULT_URL)
+        self.path = path
+        self._inbox = queue.Queue()
+        self._thread = None
+        self._conn = None
+        self.pending = 0            # runs waiting on disk (set by the worker)
+        self.uploaded = 0; self.failures = 0; self.dropped = 0
+        self.error = None           # last upload error, None while the service is reachable
+        self.retry_at = 0.0
+
+    # ---- frame thread ----
+    def submit(self, sim, replay=None):
+        """Queue `sim`'s finished run for upload. Never blocks."""
+        self.start(); self._inbox.put(run_record(sim, replay))
+
+    def start(self):
+        """Start the worker without a submission, so an old backlog uploads right away."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="leaderboard", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        """Persist whatever is still in memory and stop. Uploads in flight are abandoned
+        (they stay queued on disk and go out next time)."""
+        if self._thread is None: return True
+        if self._thread.is_alive(): self._inbox.put(_STOP); self._thread.join(timeout)
+        # a worker stuck in a request (or dead) hasn't picked these up: save them ourselves
+        runs = []
+        while True:
+            try: runs.append(self._inbox.get_nowait())
+            except queue.Empty: break
+        runs = [r for r in runs if r is not _STOP]
+        if runs:
+            try:
+                db = self._connect_db(); self._store(db, runs); db.close()
+            except sqlite3.Error as e: self.error = str(e)
+        return not self._thread.is_alive()
+
+    # ---- worker ----
+    def _connect_db(self):
+        db = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        db.execute("PRAGMA journal_mode=WAL"); db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        return db
+
+    def player_id(self, db):
+        row = db.execute("SELECT value FROM meta WHERE key = 'player'").fetchone()
+        if row: return row[0]
+        pid = uuid.uuid4().hex
+        with db: db.execute("INSERT INTO meta VALUES ('player', ?)", (pid,))
+        return pid
+
+    def _run(self):
+        db = player = None
+        held = []                           # runs not on disk yet (the queue file was locked)
+        stopping = False
+        while not stopping:
+            if db is None:                  # (re)open first, so a backlog uploads without new submissions
+                try:
+                    db = self._connect_db(); player = self.player_id(db)
+                    self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+                except sqlite3.Error as e:  # e.g. another instance holds the file: retry later
+                    self.error = str(e); self._backoff(); db = None
+            waiting = self.pending or held or db is None
+            wait = max(0.0, self.retry_at - time.monotonic()) if waiting else None
+            try: batch = [self._inbox.get(timeout=wait)]
+            except queue.Empty: batch = []
+            while True:                     # drain whatever queued up meanwhile
+                try: batch.append(self._inbox.get_nowait())
+                except queue.Empty: break
+            runs = [r for r in batch if r is not _STOP]
+            stopping = len(runs) != len(batch); held += runs
+            if db is None: continue
+            try:
+                if held: self._store(db, held); held = []
+                if stopping or not self.pending or time.monotonic() < self.retry_at: continue
+                self._upload(db, player)
+            except sqlite3.Error as e:
+                self.error = str(e); self._backoff()
+                db.close(); db = None
+        for r in held: self._inbox.put(r)   # stop() makes one last attempt
+        if self._conn is not None: self._conn.close()
+        if db is not None: db.close()
+
+    def _store(self, db, runs):
+        with db:
+            db.executemany("INSERT OR IGNORE INTO pending (run_id, payload) VALUES (?, ?)",
+                           [(r["id"], json.dumps(r)) for r in runs])
+            over = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0] - MAX_BACKLOG
+            if over > 0:
+                db.execute("DELETE FROM pending WHERE id IN (SELECT id FROM pending ORDER BY id LIMIT ?)", (over,))
+                self.dropped += over
+        self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+
+    def _backoff(self):
+        self.failures += 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** min(self.failures - 1, 16))
+        self.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+
+    def _upload(self, db, player):
+        rows = db.execute("SELECT run_id, payload FROM pending ORDER BY id LIMIT ?", (BATCH,)).fetchall()
+        done = []                           # run ids the service took or refused for good
+        try:
+            self._send([dict(json.loads(p), player=player) for _, p in rows], done)
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            if self._conn is not None: self._conn.close(); self._conn = None
+            self.error = str(e) or type(e).__name__; self._backoff()
+        else:
+            self.failures = 0; self.error = None; self.retry_at = 0.0
+        with db: db.executemany("DELETE FROM pending WHERE run_id = ?", [(rid,) for rid in done])
+        self.pending = db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+        return self.retry_at == 0.0
+
+    def _send(self, runs, done):
+        """Upload `runs`, splitting a refused batch in halves so only the runs the
+        service rejects on their own are dropped."""
+        try:
+            self._post(runs)
+        except UploadError:
+            if len(runs) > 1:
+                half = len(runs) // 2
+                self._send(runs[:half], done); self._send(runs[half:], done); return
+            self.dropped += 1                          # the service will never take this run: drop it
+        else:
+            self.uploaded += len(runs)
+        done += [r["id"] for r in runs]
+
+    def _post(self, runs):
+        """POST one batch on the kept-alive connection; returns the ids the service stored
+        (a 200 means it has taken the whole batch, duplicates included)."""
+        u = urlsplit(self.url); body = json.dumps(dict(runs=runs)).encode()
+        for attempt in (0, 1):
+            reused = self._conn is not None
+            if not reused:
+                cls = http.client.HTTPSConnection if u.scheme == "https" else http.client.HTTPConnection
+                self._conn = cls(u.hostname, u.port, timeout=TIMEOUT)
+            try:
+                self._conn.request("POST", u.path.rstrip("/") + SCORES_PATH, body,
+                                   {"Content-Type": "application/json", "Connection": "keep-alive"})
+                resp = self._conn.getresponse(); data = resp.read()
+                break
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # the server closed an idle keep-alive connection: one retry on a fresh one
+                self._conn.close(); self._conn = None
+                if not reused or attempt: raise
+        if resp.status == 200:
+            try: return json.loads(data)["accepted"]
+            except (KeyError, TypeError): raise http.client.HTTPException("malformed response") from None
+        if resp.status in REJECTED:
+            raise UploadError(f"HTTP {resp.status}: {data[:200].decode(errors='replace')}")
+        # anything else (401/403/404 from a wrong URL or a captive portal, 5xx, ...) is the
+        # service's problem, not the runs': keep them and back off
+        raise http.client.HTTPException(f"HTTP {resp.status}")
+
+LEADERBOARD = LeaderboardClient()
@@ -0,0 +1,104 @@
+# leaderboard_server.py
+# Small reference leaderboard service for local play and for exercising
+# leaderboard.py: keep-alive HTTP/1.1, scores held in memory (optionally
+# saved to a JSON file), runs deduplicated by their client id.
+#
+#   python leaderboard_server.py                     # http://127.0.0.1:8765
+#   python leaderboard_server.py --save scores.json --fail-rate 0.3
+#
+# POST /api/v1/scores  {"runs": [...]}             -> {"accepted": [ids]}
+# GET  /api/v1/top?diff=Normal&vehicle=compact&n=10 -> {"top": [...]}
+import argparse, json, os, random, sys, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+MAX_BODY = 1 << 20
+MAX_BATCH = 500
+REQUIRED = {"id": str, "score": int, "elapsed": (int, float), "diff": str, "vehicle": str}
+
+def valid(run):
+    return isinstance(run, dict) and all(isinstance(run.get(k), t) for k, t in REQUIRED.items()) \
+        and 0 < len(run["id"]) <= 64 and run["score"] >= 0 and run["elapsed"] >= 0
+
+class Store:
+    def __init__(self, path=None):
+        self.path = path; self.lock = threading.Lock(); self.runs = {}
+        if path and os.path.exists(path):
+            with open(path) as f: self.runs = {r["id"]: r for r in json.load(f)}
+
+    def add(self, runs):
+        with self.lock:
+            for r in runs: self.runs.setdefault(r["id"], r)
+            if self.path:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w") as f: json.dump(list(self.runs.values()), f)
+                os.replace(tmp, self.path)
+        return [r["id"] for r in runs]
+
+    def top(self, diff=None, vehicle=None, n=10):
+        with self.lock:
+            rows = [r for r in self.runs.values()
+                    if (diff is None or r["diff"] == diff) and (vehicle is None or r["vehicle"] == vehicle)]
+        return sorted(rows, key=lambda r: -r["score"])[:n]
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"        # keep-alive: one connection carries every batch
+
+    def reply(self, status, obj):
+        body = json.dumps(obj).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json"); self.send_header("Content-Length", str(len(body)))
+        self.end_headers(); self.wfile.write(body)
+
+    def do_POST(self):
+        size = int(self.headers.get("Content-Length") or 0)
+        if size > MAX_BODY: self.close_connection = True; return self.reply(413, dict(error="too large"))
+        body = self.rfile.read(size)
+        if urlsplit(self.path).path != "/api/v1/scores": return self.reply(404, dict(error="not found"))
+        if random.random() < self.server.fail_rate: return self.reply(503, dict(error="try later"))
+        try: runs = json.loads(body)["runs"]
+        except (ValueError, KeyError, TypeError): return self.reply(400, dict(error="bad json"))
+        if not isinstance(runs, list) or len(runs) > MAX_BATCH or not all(map(valid, runs)):
+            return self.reply(400, dict(error="bad runs"))
+        self.reply(200, dict(accepted=self.server.store.add(runs)))
+
+    def do_GET(self):
+        u = urlsplit(self.path)
+        if u.path != "/api/v1/top": return self.reply(404, dict(error="not found"))
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        try: n = max(1, min(100, int(q.get("n", 10))))
+        except ValueError: return self.reply(400, dict(error="bad n"))
+        self.reply(200, dict(top=self.server.store.top(q.get("diff"), q.get("vehicle"), n)))
+
+    def setup(self):
+        super().setup()
+        with self.server.lock: self.server.connections += 1
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose: super().log_message(fmt, *args)
+
+def serve(host="127.0.0.1", port=8765, save=None, fail_rate=0.0, verbose=False):
+    """Start the server on a daemon thread; returns (server, thread). Port 0 picks a free one."""
+    srv = ThreadingHTTPServer((host, port), Handler)
+    srv.daemon_threads = True
+    srv.store = Store(save); srv.fail_rate = fail_rate; srv.verbose = verbose
+    srv.lock = threading.Lock(); srv.connections = 0
+    t = threading.Thread(target=srv.serve_forever, name="leaderboard-server", daemon=True); t.start()
+    return srv, t
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Local reference leaderboard service")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--save", metavar="JSON", help="keep scores in this file across restarts")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="answer this share of uploads with 503 (tests the client's backoff)")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+    srv, t = serve(args.host, args.port, args.save, args.fail_rate, args.verbose)
+    print(f"leaderboard on http://{args.host}:{srv.server_address[1]}")
+    try: t.join()
+    except KeyboardInterrupt: srv.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+# mission_gen.py
+# Procedural daily missions. For each difficulty, a batch of headless runs with
+# the dodge bot records how far each run got (time survived, coins, peak combo,
+# distance). Those samples are cached on disk keyed by everything that affects
+# them, and any candidate goal set is rated by the fraction of sampled runs
+# that would have completed it. Each day's seed picks goal kinds and targets
+# landing in the difficulty's completion-rate band.
+#
+# DailyMissions runs the whole thing in a child process (this file with --json)
+# so the frame loop never pays for it; poll() hands the finished MissionDefs over.
+import argparse, datetime, json, os, random, subprocess, sys
+from sim import Simulation, DIFFS, SIM_DT
+from missions import MissionDef, Goal
+from bots import DodgeBot
+from data import write_atomic
+
+CACHE_FILE = "mission_cache.json"
+CACHE_VERSION = 1        # bump when sim rules change in ways DIFFS doesn't capture
+SAMPLE_RUNS = 120
+SAMPLE_SEED = 1
+MAX_SECONDS = 180
+
+# completion-rate band a daily mission should land in, per difficulty
+TARGET_BAND = {"Easy": (0.45, 0.75), "Normal": (0.25, 0.5), "Hard": (0.08, 0.3)}
+REWARD_BASE = 200
+
+METRICS = ("survive", "coins", "combo", "distance")     # order of a sample row
+NICE_STEP = {"survive": 5, "coins": 1, "combo": 1, "distance": 100}
+TEMPLATES = (("survive",), ("coins",), ("combo",), ("distance",), ("survive", "coins"), ("distance", "combo"))
+TITLES = {"survive": "Hold On", "coins": "Coin Run", "combo": "Thread the Needle", "distance": "Mileage",
+          ("survive", "coins"): "Scavenger", ("distance", "combo"): "Daredevil Commute"}
+
+# ---------------- Sampling ----------------
+def sample_runs(diff, runs=SAMPLE_RUNS, seed=SAMPLE_SEED):
+    """[(seconds, coins, peak combo, metres), ...] for `runs` dodge-bot runs."""
+    rows = []
+    limit = int(MAX_SECONDS / SIM_DT)
+    for i in range(runs):
+        sim = Simulation(diff, seed=seed + i); bot = DodgeBot(seed=seed + i)
+        peak = 0
+        while not sim.dead and sim.frame < limit:
+            sim.step(SIM_DT, bot(sim))
+            if sim.near_miss_combo > peak: peak = sim.near_miss_combo
+        rows.append((round(sim.elapsed, 2), sim.coins_collected, peak, round(sim.distance, 1)))
+    return rows
+
+def cache_key(diff, runs, seed):
+    return json.dumps([CACHE_VERSION, diff, DIFFS[diff], runs, seed, MAX_SECONDS], sort_keys=True)
+
+def load_samples(diff, runs=SAMPLE_RUNS, seed=SAMPLE_SEED, path=CACHE_FILE):
+    """Cached samples for these parameters, simulating (and caching) on a miss."""
+    cache = {}
+    if os.path.exists(path):
+        try:
+            with open(path) as f: cache = json.load(f)
+        except ValueError: cache = {}
+    key = cache_key(diff, runs, seed)
+    if key not in cache:
+        cache[key] = sample_runs(diff, runs, seed)
+        write_atomic(path, json.dumps(cache))
+    return [tuple(r) for r in cache[key]]
+
+# ---------------- Estimates ----------------
+def completion_rate(samples, goals):
+    """Fraction of sampled runs that reach every (kind, target) in `goals`."""
+    idx = [(METRICS.index(k), t) for k, t in goals]
+    return sum(all(r[i] >= t for i, t in idx) for r in samples) / len(samples) if samples else 0.0
+
+def _nice(kind, v):
+    step = NICE_STEP[kind]
+    return max(step, int(round(v / step)) * step)
+
+def _target_for(samples, kind, p):
+    """Target that roughly a fraction `p` of the samples reach."""
+    vals = sorted(r[METRICS.index(kind)] for r in samples)
+    return _nice(kind, vals[min(len(vals)-1, int((1.0 - p) * len(vals)))])
+
+def make_mission(samples, template, band, rng):
+    """Pick targets for `template` so its estimated completion rate lands in `band`."""
+    lo, hi = band
+    for _ in range(12):
+        want = rng.uniform(lo, hi)
+        # a composite splits the difficulty between its goals
+        per_goal = want ** (1.0 / len(template))
+        goals = [(k, _target_for(samples, k, per_goal)) for k in template]
+        rate = completion_rate(samples, goals)
+        if lo <= rate <= hi: return goals, rate
+    return goals, rate
+
+def generate(day=None, per_diff=2, path=CACHE_FILE):
+    """Daily mission dicts (MissionDef.from_dict layout) for every difficulty."""
+    day = day or datetime.date.today()
+    out = []
+    for diff in DIFFS:
+        samples = load_samples(diff, path=path)
+        rng = random.Random(f"{day.isoformat()}:{diff}")
+        band = TARGET_BAND.get(diff, TARGET_BAND["Normal"])
+        # templates in today's order; ones the samples can't fit into the band go last
+        picks = [(t,) + make_mission(samples, t, band, rng) for t in rng.sample(TEMPLATES, len(TEMPLATES))]
+        picks.sort(key=lambda p: not band[0] <= p[2] <= band[1])
+        for n, (template, goals, rate) in enumerate(picks[:per_diff]):
+            key = template[0] if len(template) == 1 else template
+            desc = " while you ".join(Goal(k, t).label().lower() for k, t in goals).capitalize()
+            out.append(dict(id=f"daily-{day.isoformat()}-{diff.lower()}-{n}", name=f"Daily {diff}: {TITLES[key]}",
+                            goals=[dict(kind=k, target=t) for k, t in goals],
+                            reward=int(round(REWARD_BASE * (1 + 4*(1 - rate)), -1)),
+                            desc=f"{desc}. ~{rate:.0%} of runs make it.", pools=[diff], diff=diff, estimate=rate))
+    return out
+
+# ---------------- Background worker ----------------
+class DailyMissions:
+    """Generates a day's missions in a child process. poll() is non-blocking and
+    returns the MissionDefs once, when they arrive, else None. A plain
+    subprocess rather than multiprocessing: spawn would re-import the game's
+    main module (and open a second window) in the child."""
+    def __init__(self, day=None, per_diff=2, path=CACHE_FILE):
+        self.day = day or datetime.date.today(); self.per_diff = per_diff; self.path = path
+        self.proc = None
+        self.missions = None; self.error = None
+
+    def start(self):
+        cmd = [sys.executable, os.path.abspath(__file__), "--json", "--per-diff", str(self.per_diff),
+               "--cache", os.path.abspath(self.path), self.day.isoformat()]
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        return self
+
+    def poll(self):
+        if self.proc is None or self.proc.poll() is None: return None
+        out, err = self.proc.communicate(); self.proc = None
+        try:
+            self.missions = [MissionDef.from_dict(d) for d in json.loads(out)]
+        except ValueError:
+            self.error = err.decode(errors="replace").strip() or "mission generator failed"
+            return None
+        return self.missions
+
+    def stop(self):
+        if self.proc is not None and self.proc.poll() is None: self.proc.kill()
+        self.proc = None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate the daily procedural missions")
+    ap.add_argument("day", nargs="?", type=datetime.date.fromisoformat, help="YYYY-MM-DD (default: today)")
+    ap.add_argument("--per-diff", type=int, default=2)
+    ap.add_argument("--cache", default=CACHE_FILE)
+    ap.add_argument("--json", action="store_true", help="print MissionDef dicts as JSON")
+    args = ap.parse_args(argv)
+    missions = generate(args.day, args.per_diff, args.cache)
+    if args.json: print(json.dumps(missions)); return
+    for d in missions:
+        print(f"{d['name']:32s} {d['desc']:60s} reward={d['reward']}")
+
+if __name__ == "__main__":
+    main()
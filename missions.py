@@ -1,24 +1,129 @@
-from dataclasses import dataclass
+# missions.py
+# Mission definitions load from missions.json into typed, slotted MissionDefs.
+# Each goal kind maps once, at load time, to a progress function, so a running
+# Mission updates with plain calls and no per-frame branching on kind strings.
+# A mission can have several goals (all must be met in the same run) and can
+# chain into a follow-up mission that starts the moment it completes.
+import json, os
+from dataclasses import dataclass, field
+from sim import EV_MISSION
 
-class MissionDef:
-    name: str
+MISSION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "missions.json")
+
+# ---------------- Goal kinds ----------------
+# A binder takes the sim at mission start and returns progress(sim, prev) -> value.
+def _since_start(probe):
+    def bind(sim):
+        base = probe(sim)
+        return lambda sim, prev: probe(sim) - base
+    return bind
+
+def _peak(probe):
+    def bind(sim):
+        return lambda sim, prev: max(prev, probe(sim))
+    return bind
+
+# kind -> (binder, label format)
+GOAL_KINDS = {
+    "survive":  (_since_start(lambda s: s.elapsed), "Survive {}s"),
+    "coins":    (_since_start(lambda s: s.coins_collected), "Collect {} coins"),
+    "combo":    (_peak(lambda s: s.near_miss_combo), "Near-miss combo x{}"),
+    "distance": (_since_start(lambda s: s.distance), "Drive {} m"),
+}
+
+@dataclass(slots=True, frozen=True)
+class Goal:
     kind: str
     target: int
+
+    def __post_init__(self):
+        if self.kind not in GOAL_KINDS: raise ValueError(f"unknown mission goal kind {self.kind!r}")
+
+    def label(self):
+        return GOAL_KINDS[self.kind][1].format(self.target)
+
+@dataclass(slots=True)
+class MissionDef:
+    id: str
+    name: str
+    goals: tuple
     reward: int
-    desc: str
+    desc: str = ""
+    pools: tuple = ()
+    next: str | None = None
+    listed: bool = True
+    diff: str | None = None             # played at this difficulty instead of the selected one
+    binders: tuple = field(default=(), repr=False, compare=False)
+
+    def __post_init__(self):
+        if not self.goals: raise ValueError(f"mission {self.id!r} has no goals")
+        self.binders = tuple(GOAL_KINDS[g.kind][0] for g in self.goals)
 
-MISSION_SELETS = [
-    dict(name="Endurance 60", kind="survive", target=60, reward=400, desc="Survive for 60 seconds."),
-    dict(name="Coin Collector 20", kind="coins", target=20, reward=300, desc="Collect 20 coins in one run."),
-    dict(name="Combo x6", kind="combo", target=6, reward=350, desc="Reach a near-miss combo of x6."),
-    dict(name="Endurance 90", kind="survive", target=90, reward=650, desc="Survive for 90 seconds."),
-    dict(name="Coin Collector 35", kind="coins", target=35, reward=520, desc="Collect 35 coins in one run."),
-    dict(name="Combo x8", kind="combo", target=8, reward=600, desc="Hit a near-miss combo of x8."),
-]
+    @classmethod
+    def from_dict(cls, d):
+        return cls(id=d["id"], name=d.get("name", d["id"]), reward=int(d["reward"]), desc=d.get("desc", ""),
+                   goals=tuple(Goal(g["kind"], int(g["target"])) for g in d["goals"]),
+                   pools=tuple(d.get("pools", ())), next=d.get("next"), listed=d.get("listed", True),
+                   diff=d.get("diff"))
+
+    @classmethod
+    def single(cls, kind, target, reward):
+        """An ad-hoc one-goal mission (old replays, tools)."""
+        return cls(id=f"{kind}_{target}", name=Goal(kind, int(target)).label(), goals=(Goal(kind, int(target)),),
+                   reward=int(reward))
+
+    def label(self):
+        return " + ".join(g.label() for g in self.goals)
+
+def load_missions(path=MISSION_FILE):
+    with open(path) as f:
+        defs = [MissionDef.from_dict(d) for d in json.load(f)["missions"]]
+    catalog = {d.id: d for d in defs}
+    for d in defs:
+        if d.next is not None and d.next not in catalog:
+            raise ValueError(f"mission {d.id!r} chains to unknown mission {d.next!r}")
+    return catalog
+
+CATALOG = load_missions()
+MISSION_SELETS = [d for d in CATALOG.values() if d.listed]   # the missions screen, in file order
 
 def generate_difficulty(diff_name: str):
-    if diff_name == "Esay":
-        return MISSION_SELETS[:3]
-    elif diff_name == "Hard":
-        return MISSION_SELETS[3:]
-    return MISSION_SELETS[:3] + MISSION_SELETS[3:4]
\ No newline at end of file
+    """Mission definitions in `diff_name`'s pool (Normal's if the name is unknown)."""
+    pool = [d for d in CATALOG.values() if diff_name in d.pools]
+    return pool or [d for d in CATALOG.values() if "Normal" in d.pools]
+
+# ---------------- Running missions ----------------
+class Mission:
+    """A MissionDef being played. start(sim) binds its progress functions to
+    the run (Simulation.reset does this); update_progress is called every step."""
+    __slots__ = ("defn", "reward", "progress", "completed", "popup_t", "_fns", "_targets")
+
+    def __init__(self, defn):
+        self.defn = defn; self.reward = defn.reward
+        self.progress = [0]*len(defn.goals); self.completed = False; self.popup_t = 0.0
+        self._fns = (); self._targets = tuple(g.target for g in defn.goals)
+
+    def start(self, sim):
+        self._fns = tuple(bind(sim) for bind in self.defn.binders)
+        self.progress = [0]*len(self._fns)
+
+    def label(self):
+        return self.defn.label()
+
+    def goal_lines(self):
+        """One "Collect 15 coins [3/15]" string per goal."""
+        return [f"{g.label()} [{int(min(p, g.target))}/{g.target}]" for g, p in zip(self.defn.goals, self.progress)]
+
+    def update_progress(self, sim, dt):
+        if self.completed: return
+        prog = self.progress; done = True
+        for i, fn in enumerate(self._fns):
+            v = prog[i] = fn(sim, prog[i])
+            if v < self._targets[i]: done = False
+        if done: self.complete(sim)
+
+    def complete(self, sim):
+        self.completed = True; sim.score += self.reward; self.popup_t = 2.0
+        sim.events.append((EV_MISSION, self))
+        if self.defn.next is not None:
+            nxt = Mission(CATALOG[self.defn.next]); nxt.start(sim); sim.missions.append(nxt)
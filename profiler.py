@@ -0,0 +1,115 @@
+# profiler.py
+# Per-phase frame timings. The frame loop and Simulation.step call lap(phase)
+# at the end of each phase; each call charges the time since the previous lap
+# to that phase (summed over every sim step in the frame). end_frame() files
+# the row, plus entity counts, into a fixed ring buffer. While disabled, lap()
+# returns at once and the sim holds no profiler at all, so it can stay in
+# release builds.
+#
+# No pygame at import time: sim.py imports the phase ids from here.
+import csv, json, time
+import numpy as np
+
+PHASES = ("events", "update", "spawn", "move", "cull", "collide", "near_miss", "missions",
+          "world", "weather", "hud", "overlay", "present")
+(P_EVENTS, P_UPDATE, P_SPAWN, P_MOVE, P_CULL, P_COLLIDE, P_NEAR_MISS, P_MISSIONS,
+ P_WORLD, P_WEATHER, P_HUD, P_OVERLAY, P_PRESENT) = range(len(PHASES))
+COUNTS = ("enemies", "coins", "powerups")     # indexed by entities.KIND_*
+CAPACITY = 600                                # 10 s at 60 FPS
+
+class FrameProfiler:
+    def __init__(self, capacity=CAPACITY):
+        self.on = False
+        self.capacity = capacity
+        self.times = np.zeros((capacity, len(PHASES)), np.float64)   # seconds per phase
+        self.total = np.zeros(capacity, np.float64)                  # begin_frame -> end_frame
+        self.counts = np.zeros((capacity, len(COUNTS)), np.int32)
+        self.n = 0                       # frames recorded (the ring holds the last `capacity`)
+        self._row = np.zeros(len(PHASES), np.float64)
+        self._t0 = self._last = 0.0
+        self._text = []; self._text_n = -1        # overlay text surfaces and the frame count they were made at
+
+    def enable(self, on=True):
+        if on and not self.on: self.clear()
+        self.on = on
+
+    def clear(self):
+        self.n = 0; self._text_n = -1
+
+    # ---- recording ----
+    def begin_frame(self):
+        if not self.on: return
+        self._row[:] = 0.0; self._t0 = self._last = time.perf_counter()
+
+    def lap(self, phase):
+        if not self.on: return
+        now = time.perf_counter(); self._row[phase] += now - self._last; self._last = now
+
+    def end_frame(self, ents=None):
+        if not self.on: return
+        i = self.n % self.capacity
+        self.times[i] = self._row; self.total[i] = time.perf_counter() - self._t0
+        if ents is not None:
+            hi = ents.hi
+            self.counts[i] = np.bincount(ents.kind[:hi][ents.alive[:hi]], minlength=len(COUNTS))[:len(COUNTS)]
+        self.n += 1
+
+    # ---- reading ----
+    def _order(self):
+        """Ring rows oldest -> newest."""
+        if self.n <= self.capacity: return np.arange(self.n)
+        return (np.arange(self.capacity) + self.n) % self.capacity
+
+    def frame_ms(self):
+        return self.total[self._order()] * 1000.0
+
+    def percentiles(self, qs=(50, 95, 99)):
+        ms = self.frame_ms()
+        return dict(zip(qs, np.percentile(ms, qs))) if len(ms) else {q: 0.0 for q in qs}
+
+    def phase_ms(self, last=60):
+        """Mean ms per phase over the last `last` frames."""
+        rows = self._order()[-last:]
+        mean = self.times[rows].mean(axis=0) * 1000.0 if len(rows) else np.zeros(len(PHASES))
+        return dict(zip(PHASES, mean))
+
+    # ---- export ----
+    def export(self, path):
+        """Write the buffer as CSV (one row per frame) or JSON (rows plus a summary), by extension."""
+        rows = self._order()
+        if path.endswith(".json"):
+            out = dict(phases=PHASES, counts=COUNTS,
+                       summary=dict(frames=len(rows), **{f"p{q}_ms": v for q, v in self.percentiles().items()},
+                                    mean_phase_ms=self.phase_ms(len(rows))),
+                       frames=[dict(total_ms=self.total[i]*1000.0, **{p: self.times[i, j]*1000.0 for j, p in enumerate(PHASES)},
+                                    **{c: int(self.counts[i, j]) for j, c in enumerate(COUNTS)}) for i in rows])
+            with open(path, "w") as f: json.dump(out, f, indent=1, default=float)
+        else:
+            with open(path, "w", newline="") as f:
+                w = csv.writer(f); w.writerow(("frame", "total_ms") + PHASES + COUNTS)
+                for k, i in enumerate(rows):
+                    w.writerow([k, f"{self.total[i]*1000.0:.4f}"] + [f"{v*1000.0:.4f}" for v in self.times[i]]
+                               + self.counts[i].tolist())
+        return path
+
+    # ---- overlay ----
+    def draw(self, surf, font, x=8, y=96, w=300, h=70, target_ms=1000.0/60):
+        """Frame-time graph (last `w` frames) with the p50/p95/p99 and the costliest phases."""
+        import pygame
+        ms = self.frame_ms()[-w:]
+        panel = pygame.Rect(x, y, w + 16, h + 86)
+        pygame.draw.rect(surf, (15, 15, 20), panel); pygame.draw.rect(surf, (90, 90, 110), panel, 1)
+        gx, gy = x + 8, y + 8
+        scale = h / (2*target_ms)                   # the graph spans 0 .. two frame budgets
+        pygame.draw.line(surf, (70, 120, 70), (gx, gy + h - int(target_ms*scale)), (gx + w, gy + h - int(target_ms*scale)))
+        if len(ms) > 1:
+            ys = gy + h - np.minimum(ms*scale, h).astype(int)
+            pygame.draw.lines(surf, (250, 200, 80), False, list(zip(range(gx, gx + len(ms)), ys.tolist())))
+        if abs(self.n - self._text_n) >= 15:             # figures refresh 4x a second, not every frame
+            p = self.percentiles()
+            lines = [f"p50 {p[50]:.2f}  p95 {p[95]:.2f}  p99 {p[99]:.2f} ms"]
+            top = sorted(self.phase_ms().items(), key=lambda kv: -kv[1])[:6]
+            lines += ["  ".join(f"{k} {v:.2f}" for k, v in top[i:i+2]) for i in (0, 2, 4)]
+            self._text = [font.render(t, True, (230, 230, 230)) for t in lines]; self._text_n = self.n
+        for k, t in enumerate(self._text): surf.blit(t, (gx, gy + h + 6 + 18*k))
+        return panel
@@ -0,0 +1,110 @@
+# render_cache.py
+# Pre-rendered surfaces that would otherwise be redrawn every frame.
+import re
+from collections import OrderedDict
+import pygame
+
+class RoadLayer:
+    """Static background, road and lane dashes baked into one tall surface.
+    The surface is one dash period taller than the screen, so scrolling is a
+    single blit with a shifted source rect. Rebuilt only when the layout
+    (resolution, lane count, margin) changes."""
+    def __init__(self, bg, road, line, line_w, dash_h, dash_gap):
+        self.bg = bg; self.road = road; self.line = line
+        self.line_w = line_w; self.dash_h = dash_h; self.period = dash_h + dash_gap
+        self.key = None; self.surface = None
+        self.builds = 0
+
+    def build(self, target, lanes, margin):
+        w, h = target.get_size()
+        tall = pygame.Surface((w, h + self.period), 0, target)
+        tall.fill(self.bg)
+        pygame.draw.rect(tall, self.road, (margin, 0, w - 2*margin, tall.get_height()))
+        lane_w = (w - 2*margin) / lanes
+        for i in range(1, lanes):
+            x = int(margin + lane_w * i) - self.line_w//2
+            for y in range(0, tall.get_height(), self.period):
+                pygame.draw.rect(tall, self.line, (x, y, self.line_w, self.dash_h))
+        self.surface = tall; self.builds += 1
+
+    def draw(self, surf, scroll, lanes, margin):
+        key = (surf.get_size(), surf.get_bitsize(), lanes, margin)
+        if key != self.key: self.build(surf, lanes, margin); self.key = key
+        w, h = key[0]
+        surf.blit(self.surface, (0, 0), (0, int(scroll) % self.period, w, h))
+
+class SurfacePool:
+    """Alpha overlays and panels created once per (size, colour) and reused.
+    invalidate() drops everything, e.g. after a resolution/fullscreen change."""
+    def __init__(self):
+        self._items = {}
+        self.creates = 0
+
+    def overlay(self, size, rgba):
+        key = ("overlay", tuple(size), tuple(rgba))
+        surf = self._items.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA); surf.fill(rgba)
+            self._items[key] = surf; self.creates += 1
+        return surf
+
+    def panel(self, size, rgba, radius=0):
+        key = ("panel", tuple(size), tuple(rgba), radius)
+        surf = self._items.get(key)
+        if surf is None:
+            surf = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(surf, rgba, surf.get_rect(), border_radius=radius)
+            self._items[key] = surf; self.creates += 1
+        return surf
+
+    def invalidate(self):
+        self._items.clear()
+
+_RUNS = re.compile(r"\d|\D+")
+
+class TextCache:
+    """LRU cache of rendered text surfaces keyed by (font, text, color, antialias).
+    Text that changes every frame (scores, timers) can be drawn with
+    split_digits=True so only per-digit glyphs and the static parts are cached."""
+    def __init__(self, max_bytes=8 << 20):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        surf = self._items.get(key)
+        if surf is not None:
+            self._items.move_to_end(key); self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self._items[key] = surf
+        self.bytes += surf.get_pitch() * surf.get_height()
+        while self.bytes > self.max_bytes and len(self._items) > 1:
+            _, old = self._items.popitem(last=False)
+            self.bytes -= old.get_pitch() * old.get_height(); self.evictions += 1
+        return surf
+
+    def runs(self, font, text, color, split_digits=False):
+        if not split_digits: return [self.render(font, text, color)]
+        return [self.render(font, r, color) for r in _RUNS.findall(text)]
+
+    def width(self, font, text, color, split_digits=False):
+        return sum(s.get_width() for s in self.runs(font, text, color, split_digits))
+
+    def blit(self, surf, font, text, color, pos, split_digits=False):
+        x, y = pos
+        for s in self.runs(font, text, color, split_digits):
+            surf.blit(s, (x, y)); x += s.get_width()
+        return x
+
+    def clear(self):
+        self._items.clear(); self.bytes = 0
+
+    def stats(self):
+        return dict(hits=self.hits, misses=self.misses, evictions=self.evictions,
+                    entries=len(self._items), bytes=self.bytes)
+
+TEXT_CACHE = TextCache()
@@ -0,0 +1,141 @@
+# replay.py
+# Compact binary replays: the run's seed and setup plus a delta-encoded list
+# of (frame, input) events. Re-simulating a replay headless reproduces the run
+# exactly, so a few dozen bytes are enough to re-verify a high score.
+#
+# Layout (all integers are unsigned LEB128 varints, strings are varint length
+# + UTF-8):
+#   MAGIC, seed, difficulty, vehicle,
+#   mission count, then per mission: id, reward, next id ("" for none),
+#     goal count, then per goal: kind, target
+#   frames simulated, final score (int),
+#   event count, then per event: (frame delta << 2) | input code
+from sim import Simulation, SIM_DT
+from missions import Mission, MissionDef, Goal
+
+MAGIC = b"TRR\x02"
+MAGIC_V1 = b"TRR\x01"   # missions stored as (kind, target, reward)
+
+# input codes (2 bits)
+IN_LEFT, IN_RIGHT, IN_RAIN_ON, IN_RAIN_OFF = 0, 1, 2, 3
+
+class ReplayError(ValueError):
+    pass
+
+def write_varint(out, n):
+    while True:
+        b = n & 0x7F; n >>= 7
+        if n: out.append(b | 0x80)
+        else: out.append(b); return
+
+def read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        if pos >= len(buf): raise ReplayError("truncated replay")
+        b = buf[pos]; pos += 1
+        n |= (b & 0x7F) << shift; shift += 7
+        if not b & 0x80: return n, pos
+
+def _write_str(out, s):
+    raw = s.encode("utf-8"); write_varint(out, len(raw)); out += raw
+
+def _read_str(buf, pos):
+    n, pos = read_varint(buf, pos)
+    if pos + n > len(buf): raise ReplayError("truncated replay")
+    return bytes(buf[pos:pos+n]).decode("utf-8"), pos + n
+
+class Replay:
+    def __init__(self, seed, diff="Normal", vehicle="compact", missions=()):
+        self.seed = seed; self.diff = diff; self.vehicle = vehicle
+        self.missions = list(missions)  # MissionDefs active at the start of the run
+        self.events = []  # (frame, code), frames non-decreasing
+        self.frames = 0; self.score = 0
+
+    @classmethod
+    def for_sim(cls, sim):
+        """Start recording a run that was just reset."""
+        return cls(sim.seed, sim.diff, sim.vehicle_id, [m.defn for m in sim.missions])
+
+    # ---- recording ----
+    def add(self, frame, code):
+        self.events.append((frame, code))
+
+    def record_step(self, sim, actions, rain):
+        """Record the inputs about to be passed to sim.step()."""
+        if rain != sim.rain: self.add(sim.frame, IN_RAIN_ON if rain else IN_RAIN_OFF)
+        for a in actions: self.add(sim.frame, IN_LEFT if a < 0 else IN_RIGHT)
+
+    def finish(self, sim):
+        self.frames = sim.frame; self.score = int(sim.score)
+
+    # ---- encoding ----
+    def to_bytes(self):
+        out = bytearray(MAGIC)
+        write_varint(out, self.seed); _write_str(out, self.diff); _write_str(out, self.vehicle)
+        write_varint(out, len(self.missions))
+        for d in self.missions:
+            _write_str(out, d.id); write_varint(out, d.reward); _write_str(out, d.next or "")
+            write_varint(out, len(d.goals))
+            for g in d.goals: _write_str(out, g.kind); write_varint(out, g.target)
+        write_varint(out, self.frames); write_varint(out, self.score)
+        write_varint(out, len(self.events))
+        last = 0
+        for frame, code in self.events:
+            write_varint(out, ((frame - last) << 2) | code); last = frame
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, buf):
+        if buf[:4] not in (MAGIC, MAGIC_V1): raise ReplayError("not a Traffic Rush replay")
+        v1 = buf[:4] == MAGIC_V1; pos = 4
+        seed, pos = read_varint(buf, pos)
+        diff, pos = _read_str(buf, pos); vehicle, pos = _read_str(buf, pos)
+        n, pos = read_varint(buf, pos)
+        missions = []
+        for _ in range(n):
+            if v1:
+                kind, pos = _read_str(buf, pos); target, pos = read_varint(buf, pos); reward, pos = read_varint(buf, pos)
+                missions.append(MissionDef.single(kind, target, reward)); continue
+            mid, pos = _read_str(buf, pos); reward, pos = read_varint(buf, pos); nxt, pos = _read_str(buf, pos)
+            k, pos = read_varint(buf, pos); goals = []
+            for _ in range(k):
+                kind, pos = _read_str(buf, pos); target, pos = read_varint(buf, pos); goals.append(Goal(kind, target))
+            try: missions.append(MissionDef(id=mid, name=mid, goals=tuple(goals), reward=reward, next=nxt or None))
+            except ValueError as e: raise ReplayError(str(e))
+        r = cls(seed, diff, vehicle, missions)
+        r.frames, pos = read_varint(buf, pos); r.score, pos = read_varint(buf, pos)
+        n, pos = read_varint(buf, pos)
+        frame = 0
+        for _ in range(n):
+            v, pos = read_varint(buf, pos)
+            frame += v >> 2; r.events.append((frame, v & 3))
+        return r
+
+    def save(self, path):
+        with open(path, "wb") as f: f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f: return cls.from_bytes(f.read())
+
+# ---------------- Playback ----------------
+def play(replay, on_step=None):
+    """Re-simulate `replay` headless as fast as possible and return the final
+    Simulation. on_step(sim) is called after every step (e.g. to render)."""
+    sim = Simulation(replay.diff, replay.vehicle, [Mission(d) for d in replay.missions], seed=replay.seed)
+    events = replay.events; i = 0; actions = []
+    while sim.frame < replay.frames and not sim.dead:
+        actions.clear()
+        while i < len(events) and events[i][0] == sim.frame:
+            code = events[i][1]; i += 1
+            if code == IN_LEFT: actions.append(-1)
+            elif code == IN_RIGHT: actions.append(+1)
+            else: sim.rain = code == IN_RAIN_ON
+        sim.step(SIM_DT, actions)
+        if on_step: on_step(sim)
+    return sim
+
+def verify(replay):
+    """True if re-simulating the replay reaches the recorded frame count and score."""
+    sim = play(replay)
+    return sim.frame == replay.frames and int(sim.score) == replay.score
@@ -0,0 +1,257 @@
+# sim.py
+# Headless simulation core for Traffic Rush. Owns spawning, movement, culling,
+# collisions, near-misses and drives mission progress (missions.Mission objects,
+# duck-typed: start/update_progress). Must never import pygame so it
+# can run without a display (bots, balance tuning, replays).
+import random
+from entities import EntityStore, KIND_ENEMY, KIND_COIN, KIND_POWERUP, F_NEAR_MISS
+from profiler import P_UPDATE, P_SPAWN, P_MOVE, P_CULL, P_COLLIDE, P_NEAR_MISS, P_MISSIONS
+
+# ---- Settings ----
+WIDTH, HEIGHT = 480, 720
+
+LANES = 6
+ROAD_MARGIN = 80
+DASH_HEIGHT = 40
+DASH_GAP = 30
+
+PLAYER_WIDTH, PLAYER_HEIGHT = 40, 68
+ENEMY_WIDTH, ENEMY_HEIGHT = 42, 70
+COIN_SIZE = 24
+PWR_SIZE = 26
+
+DIFFS = {
+    "Easy":   dict(START_SPEED=220.0, SPEED_RAMP=22.0, SPAWN=(0.9, 1.4)),
+    "Normal": dict(START_SPEED=260.0, SPEED_RAMP=28.0, SPAWN=(0.7, 1.2)),
+    "Hard":   dict(START_SPEED=300.0, SPEED_RAMP=34.0, SPAWN=(0.55, 1.0)),
+}
+
+# spawn interval shrinks linearly over SPAWN_RAMP_TIME seconds down to SPAWN_FLOOR
+# of its base value; DIFFS entries or Simulation(params=...) may override both
+SPAWN_FLOOR = 0.55
+SPAWN_RAMP_TIME = 120.0
+
+POWERUP_KINDS = ("SLOW", "GHOST", "MAGNET")
+POWERUP_TIME = {"SLOW": 4.0, "GHOST": 3.0, "MAGNET": 6.0}
+SLOW_FACTOR = 0.55
+CULL_Y = HEIGHT + 40
+NEAR_MISS_GAP = 26
+SPAWN_GAP = 140
+MAGNET_RANGE = 160
+MAGNET_PULL = 240
+
+# Fixed simulation rate. Gameplay was tuned at 60 FPS, so one step is one of
+# those frames regardless of how fast the game renders.
+SIM_HZ = 60
+SIM_DT = 1.0 / SIM_HZ
+MAX_STEPS_PER_FRAME = 5
+
+# step() events: (kind, value)
+EV_COIN = "coin"
+EV_POWERUP = "powerup"
+EV_NEAR_MISS = "near_miss"
+EV_CRASH = "crash"
+EV_MISSION = "mission"
+EV_DISTANCE = "distance"    # every step, value = metres travelled (distance score) that step
+
+# Enemy colours are rolled as (160-255, 40-140, 40-140) and stored with the
+# index of their cell on a 3x3x3 grid over that range; renderers draw the cell's
+# ENEMY_PALETTE colour from pre-baked sprites.
+ENEMY_PALETTE = [(176 + 32*r, 57 + 34*g, 57 + 34*b) for r in range(3) for g in range(3) for b in range(3)]
+
+def enemy_variant(r, g, b):
+    return ((r - 160)*3//96)*9 + ((g - 40)*3//101)*3 + (b - 40)*3//101
+
+def lane_centers(lanes=LANES):
+    road_w = WIDTH - 2 * ROAD_MARGIN
+    lane_w = road_w / lanes
+    return [int(ROAD_MARGIN + lane_w*(i+0.5)) for i in range(lanes)]
+LANE_X = lane_centers()
+
+# ---------------- Bodies ----------------
+class Body:
+    __slots__ = ("lane", "x", "y", "w", "h")
+    def __init__(self, lane, y, w, h):
+        self.lane = lane; self.x = float(LANE_X[lane]); self.y = float(y); self.w = w; self.h = h
+    @property
+    def top(self): return self.y - self.h/2
+    @property
+    def bottom(self): return self.y + self.h/2
+    def overlaps(self, o):
+        return abs(self.x - o.x)*2 < self.w + o.w and abs(self.y - o.y)*2 < self.h + o.h
+    def offscreen(self): return self.top > CULL_Y
+
+class Player(Body):
+    __slots__ = ("vehicle_id",)
+    def __init__(self, vehicle_id="compact"):
+        Body.__init__(self, LANES//2, HEIGHT - 120, PLAYER_WIDTH, PLAYER_HEIGHT)
+        self.vehicle_id = vehicle_id
+    def move_lane(self, delta, rng, slippery=False):
+        """Returns True when the rain made the car slip past its target lane."""
+        target = max(0, min(LANES-1, self.lane + delta))
+        slipped = False
+        if slippery and rng.random() < 0.18 and 0 < target < LANES-1:
+            target += rng.choice([-1,1]); slipped = True
+            target = max(0, min(LANES-1, target))
+        self.lane = target; self.x = float(LANE_X[target])
+        return slipped
+
+# ---------------- Fixed timestep ----------------
+class FixedStep:
+    """Accumulates real frame time and hands out whole simulation steps.
+    `alpha` is how far the renderer sits between the last two steps. Frames
+    that would need more than `max_steps` steps drop the excess time instead
+    of spiralling (the game slows down rather than tunnelling)."""
+    def __init__(self, dt=SIM_DT, max_steps=MAX_STEPS_PER_FRAME):
+        self.dt = dt; self.max_steps = max_steps
+        self.acc = 0.0; self.dropped = 0.0
+    def advance(self, frame_dt):
+        self.acc += frame_dt
+        n = int(self.acc / self.dt)
+        self.acc -= n*self.dt
+        if n > self.max_steps:
+            self.dropped += (n - self.max_steps)*self.dt; n = self.max_steps
+        return n
+    @property
+    def alpha(self): return self.acc / self.dt
+    def reset(self): self.acc = 0.0
+
+# ---------------- Simulation ----------------
+class Simulation:
+    def __init__(self, diff="Normal", vehicle_id="compact", missions=(), seed=None, params=None):
+        self.vehicle_id = vehicle_id
+        self.set_difficulty(diff, params)
+        self.rain = False
+        self.events = []
+        self.ents = EntityStore(lanes=LANES)
+        self.lanes = self.ents.lane_index
+        self.prof = None            # a profiler.FrameProfiler while profiling, timing each phase of step()
+        self.reset(missions, seed)
+
+    def set_difficulty(self, name, params=None):
+        self.diff = name
+        d = dict(DIFFS[name]); d.update(params or {})
+        self.START_SPEED = d["START_SPEED"]
+        self.SPEED_RAMP = d["SPEED_RAMP"]
+        self.SPAWN_EVERY = d["SPAWN"]
+        self.SPAWN_FLOOR = d.get("SPAWN_FLOOR", SPAWN_FLOOR)
+        self.SPAWN_RAMP_TIME = d.get("SPAWN_RAMP_TIME", SPAWN_RAMP_TIME)
+
+    def reset(self, missions=(), seed=None):
+        # every run gets its own RNG stream; the seed alone reproduces it (see replay.py)
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.rng = rng = random.Random(self.seed)
+        self.player = Player(self.vehicle_id)
+        self.ents.clear()
+        self.road_scroll=self.prev_road_scroll=0.0
+        self.speed = self.START_SPEED
+        self.spawn_timer = rng.uniform(*self.SPAWN_EVERY)
+        self.coin_timer = rng.uniform(1.2,2.2)
+        self.pwr_timer = rng.uniform(6.0,10.0)
+        self.score=0.0; self.distance=0.0
+        self.coins_collected=0; self.dead=False; self.elapsed=0.0; self.near_miss_combo=0
+        self.slow_t=self.ghost_t=self.magnet_t=0.0
+        self.frame = 0
+        self.last_move_frame = -1; self.last_slip = False
+        self.missions = list(missions)
+        for m in self.missions: m.start(self)
+        self.events.clear()
+
+    def move_player(self, delta):
+        if not self.dead:
+            self.last_slip = self.player.move_lane(delta, self.rng, slippery=self.rain)
+            self.last_move_frame = self.frame
+
+    def step(self, dt, actions=()):
+        """Advance one frame. `actions` are lane deltas (-1/+1) applied first.
+        Returns the (reused) list of events raised this frame."""
+        ev = self.events; ev.clear()
+        if self.dead: return ev
+        self.ents.snapshot(); self.prev_road_scroll = self.road_scroll
+        for a in actions: self.move_player(a)
+        self.frame += 1
+        rng = self.rng; player = self.player
+        self.elapsed += dt
+        self.speed += (self.SPEED_RAMP/60.0)*dt
+        # timers
+        self.slow_t = max(0.0, self.slow_t - dt); self.ghost_t = max(0.0, self.ghost_t - dt); self.magnet_t = max(0.0, self.magnet_t - dt)
+        d = (self.speed*dt)/10.0
+        self.score += d; self.distance += d; ev.append((EV_DISTANCE, d))
+        prof = self.prof
+        if prof is not None: prof.lap(P_UPDATE)
+        self.spawn(dt)
+        if prof is not None: prof.lap(P_SPAWN)
+        # move
+        ents = self.ents
+        sf = SLOW_FACTOR if self.slow_t>0 else 1.0
+        move = self.speed*sf*dt
+        if self.magnet_t > 0: ents.attract(KIND_COIN, player.x, player.y, MAGNET_PULL*dt, MAGNET_RANGE)
+        ents.move(move)
+        if prof is not None: prof.lap(P_MOVE)
+        # cull offscreen
+        ents.cull(CULL_Y)
+        if prof is not None: prof.lap(P_CULL)
+        # collisions, coin collection and powerup pickup in one AABB pass
+        for i in ents.overlaps(player.x, player.y, player.w, player.h):
+            kind = ents.kind[i]
+            if kind == KIND_ENEMY:
+                if self.ghost_t <= 0 and not self.dead: self.dead=True; ev.append((EV_CRASH, int(i)))
+            elif kind == KIND_COIN:
+                ents.kill(i); self.coins_collected += 1; ev.append((EV_COIN, 1))
+            else:
+                pwr = POWERUP_KINDS[ents.variant[i]]
+                if pwr=="SLOW": self.slow_t = POWERUP_TIME["SLOW"]
+                elif pwr=="GHOST": self.ghost_t = POWERUP_TIME["GHOST"]
+                elif pwr=="MAGNET": self.magnet_t = POWERUP_TIME["MAGNET"]
+                ents.kill(i); ev.append((EV_POWERUP, pwr))
+        if prof is not None: prof.lap(P_COLLIDE)
+        # near-miss: enemies in the player's lane whose bottom edge just crossed the player's top
+        ptop = player.top; hh = ENEMY_HEIGHT/2
+        for i in self.lanes.between(player.lane, ptop - hh, ptop - hh + NEAR_MISS_GAP):
+            if not ents.flags[i] & F_NEAR_MISS:
+                ents.flags[i] |= F_NEAR_MISS; self.near_miss_combo += 1; self.score += 20 + 10*self.near_miss_combo
+                ev.append((EV_NEAR_MISS, self.near_miss_combo))
+        if rng.random() < 0.01: self.near_miss_combo = max(0, self.near_miss_combo-1)
+        if prof is not None: prof.lap(P_NEAR_MISS)
+        # missions
+        for m in self.missions:
+            m.update_progress(self, dt)
+            if m.popup_t > 0: m.popup_t -= dt
+        # scroll
+        self.road_scroll = (self.road_scroll + move) % (DASH_HEIGHT + DASH_GAP)
+        if prof is not None: prof.lap(P_MISSIONS)
+        return ev
+
+    def scroll_at(self, alpha):
+        """Road scroll interpolated between the last two steps."""
+        period = DASH_HEIGHT + DASH_GAP
+        return (self.prev_road_scroll + ((self.road_scroll - self.prev_road_scroll) % period)*alpha) % period
+
+    def spawn(self, dt):
+        rng = self.rng; ents = self.ents
+        self.spawn_timer -= dt
+        if self.spawn_timer <= 0:
+            lanes=list(range(LANES)); rng.shuffle(lanes)
+            cars_to_spawn = rng.choice([1,2,2,3])
+            spawned=0
+            for lane in lanes:
+                if spawned>=cars_to_spawn: break
+                if self.can_spawn_lane(lane):
+                    color = (rng.randint(160,255), rng.randint(40,140), rng.randint(40,140))
+                    ents.spawn(KIND_ENEMY, lane, LANE_X[lane], -ENEMY_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT, rng.uniform(0.85,1.2),
+                               variant=enemy_variant(*color), color=color)
+                    spawned+=1
+            self.spawn_timer = rng.uniform(*self.SPAWN_EVERY)* max(self.SPAWN_FLOOR, 1.0 - self.elapsed/self.SPAWN_RAMP_TIME)
+        self.coin_timer -= dt
+        if self.coin_timer <= 0:
+            lane = rng.randrange(LANES)
+            ents.spawn(KIND_COIN, lane, LANE_X[lane], -COIN_SIZE, COIN_SIZE, COIN_SIZE)
+            self.coin_timer = rng.uniform(1.2,2.2)
+        self.pwr_timer -= dt
+        if self.pwr_timer <= 0:
+            kind = rng.randrange(len(POWERUP_KINDS)); lane = rng.randrange(LANES)
+            ents.spawn(KIND_POWERUP, lane, LANE_X[lane], -PWR_SIZE, PWR_SIZE, PWR_SIZE, variant=kind)
+            self.pwr_timer = rng.uniform(6.0,10.0)
+
+    def can_spawn_lane(self, lane):
+        return self.lanes.gap_clear(lane, SPAWN_GAP)
@@ -0,0 +1,107 @@
+# sprites.py
+# Every entity look (the enemy palette, each garage vehicle, coins, lettered
+# power-ups, and the night versions of all of them) is rasterized once into a
+# single atlas surface. The world then draws every entity with one
+# Surface.blits() call per frame, so cost grows at blit speed with entity count.
+import pygame
+from sim import (PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT, COIN_SIZE, PWR_SIZE,
+                 POWERUP_KINDS, ENEMY_PALETTE)
+from entities import KIND_ENEMY, KIND_COIN, KIND_POWERUP
+
+GOLD = (255,210,70)
+PWR_COLORS = {"SLOW":(120,200,255),"GHOST":(200,200,255),"MAGNET":(180,255,180)}
+# garage vehicle -> (day colour, night colour, corner radius, stripe colour or None)
+VEHICLE_LOOKS = {
+    "compact": ((60,190,255), (140,200,255), 10, None),
+    "sport":   ((255,170,40), (255,200,120), 14, (30,30,40)),
+    "van":     ((225,225,230), (240,240,245), 4, (150,150,160)),
+}
+ATLAS_W = 512
+PAD = 2
+KEY = (255,0,255)      # transparent colour. pygame.draw has no anti-aliasing, so an opaque colorkeyed
+                       # atlas looks the same as per-pixel alpha and blits about twice as fast
+
+def _car(size, color, radius, night, front, stripe=None):
+    """Top-down car body; `front` is the edge ("top"/"bottom") the lights go on at night."""
+    w, h = size
+    s = pygame.Surface(size); s.fill(KEY)
+    pygame.draw.rect(s, color, (0, 0, w, h), border_radius=radius)
+    if stripe: pygame.draw.rect(s, stripe, (w//2 - 4, 2, 8, h - 4))
+    if night:
+        y = 3 if front == "top" else h - 8
+        lamp = (255,245,190) if front == "top" else (255,60,50)
+        pygame.draw.rect(s, lamp, (5, y, 9, 5), border_radius=2); pygame.draw.rect(s, lamp, (w - 14, y, 9, 5), border_radius=2)
+    return s
+
+def _coin(night):
+    s = pygame.Surface((COIN_SIZE, COIN_SIZE)); s.fill(KEY); r = COIN_SIZE//2
+    if night: pygame.draw.circle(s, (255,240,170), (r, r), r)
+    pygame.draw.circle(s, GOLD, (r, r), r - (2 if night else 0))
+    return s
+
+def _powerup(kind, font, night):
+    s = pygame.Surface((PWR_SIZE, PWR_SIZE)); s.fill(KEY)
+    color = PWR_COLORS[kind]
+    if night: color = tuple(min(255, c + 30) for c in color)
+    pygame.draw.rect(s, color, (0, 0, PWR_SIZE, PWR_SIZE), border_radius=6)
+    s.blit(font.render(kind[0], True, (30,30,40)), (PWR_SIZE//2 - 6, PWR_SIZE//2 - 8))
+    return s
+
+class SpriteAtlas:
+    def __init__(self, font):
+        self.font = font
+        self.surface = None; self.rects = {}
+        self.build()
+
+    def sprites(self):
+        for night in (False, True):
+            for v, color in enumerate(ENEMY_PALETTE):
+                yield ("enemy", v, night), _car((ENEMY_WIDTH, ENEMY_HEIGHT), color, 8, night, "bottom")
+            for name, (day, dark, radius, stripe) in VEHICLE_LOOKS.items():
+                yield ("player", name, night), _car((PLAYER_WIDTH, PLAYER_HEIGHT), dark if night else day, radius, night, "top", stripe)
+            yield ("coin", night), _coin(night)
+            for k in POWERUP_KINDS:
+                yield ("powerup", k, night), _powerup(k, self.font, night)
+
+    def build(self):
+        """Rasterize every sprite and shelf-pack them into one surface (again after a display mode change)."""
+        items = sorted(self.sprites(), key=lambda kv: -kv[1].get_height())
+        x = y = shelf = 0; placed = []
+        for key, s in items:
+            w, h = s.get_size()
+            if x + w > ATLAS_W: x = 0; y += shelf + PAD; shelf = 0
+            placed.append((key, s, pygame.Rect(x, y, w, h))); x += w + PAD; shelf = max(shelf, h)
+        atlas = pygame.Surface((ATLAS_W, y + shelf)); atlas.fill(KEY)
+        for key, s, r in placed: atlas.blit(s, r)
+        if pygame.display.get_surface() is not None: atlas = atlas.convert()
+        atlas.set_colorkey(KEY)
+        self.surface = atlas
+        self.rects = {key: r for key, _, r in placed}
+        # lookup tables for the per-frame batch
+        self.enemy = {n: [self.rects[("enemy", v, n)] for v in range(len(ENEMY_PALETTE))] for n in (False, True)}
+        self.pwr = {n: [self.rects[("powerup", k, n)] for k in POWERUP_KINDS] for n in (False, True)}
+
+    def player_rect(self, vehicle_id, night):
+        return self.rects.get(("player", vehicle_id, night)) or self.rects[("player", "compact", night)]
+
+    def draw(self, surf, sim, xs, ys, night=False):
+        """All of the sim's entities in one blits() batch; xs/ys are render positions (EntityStore.lerp)."""
+        atlas = self.surface; ents = sim.ents; batch = []
+        i = ents.indices(KIND_COIN)
+        if len(i):
+            area = self.rects[("coin", night)]
+            batch += [(atlas, p, area) for p in zip((xs[i] - COIN_SIZE/2).astype(int).tolist(), (ys[i] - COIN_SIZE/2).astype(int).tolist())]
+        i = ents.indices(KIND_POWERUP)
+        if len(i):
+            areas = self.pwr[night]
+            batch += [(atlas, (x, y), areas[v]) for x, y, v in zip((xs[i] - PWR_SIZE/2).astype(int).tolist(),
+                                                                   (ys[i] - PWR_SIZE/2).astype(int).tolist(), ents.variant[i].tolist())]
+        p = sim.player
+        batch.append((atlas, (int(p.x - p.w/2), int(p.y - p.h/2)), self.player_rect(p.vehicle_id, night)))
+        i = ents.indices(KIND_ENEMY)
+        if len(i):
+            areas = self.enemy[night]
+            batch += [(atlas, (x, y), areas[v]) for x, y, v in zip((xs[i] - ENEMY_WIDTH/2).astype(int).tolist(),
+                                                                   (ys[i] - ENEMY_HEIGHT/2).astype(int).tolist(), ents.variant[i].tolist())]
+        surf.blits(batch, doreturn=False)
+        return len(batch)
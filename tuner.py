@@ -0,0 +1,167 @@
+# tuner.py
+# Monte-Carlo difficulty tuner. Fans seeded headless runs of every DIFFS entry
+# (optionally swept over a parameter grid) across a process pool, streams each
+# finished chunk to a JSONL file so long sweeps can resume, and ranks parameter
+# sets against a target survival curve.
+#
+#   python tuner.py --runs 4000 --policy dodge --grid START_SPEED=240,260,280 \
+#       --grid SPAWN_FLOOR=0.5,0.55,0.6 --target 10:0.9,30:0.5,60:0.2 --out tune.jsonl
+import argparse, itertools, json, os, sys
+from multiprocessing import Pool
+from sim import Simulation, DIFFS, SIM_DT
+from missions import Mission, generate_difficulty
+from bots import POLICIES
+
+MAX_SECONDS = 300           # runs are cut off (censored) after this long
+HIST_BIN = 1.0              # survival histogram bin, seconds
+CHUNK = 100                 # runs per pool task / per JSONL record
+LANE_CHANGE_WINDOW = 6      # steps after a lane change that still count as "caused" by it
+
+def crash_cause(sim):
+    if sim.frame - sim.last_move_frame <= LANE_CHANGE_WINDOW:
+        return "slip" if sim.last_slip else "lane_change"
+    return "blocked"
+
+def run_chunk(job):
+    """Worker: simulate one chunk of seeded runs and return its aggregate."""
+    key, diff, params, policy, chunk, seeds = job
+    hist = [0]*int(MAX_SECONDS/HIST_BIN + 1)
+    causes = {}; mission_done = {}; censored = 0; total_t = 0.0
+    defs = generate_difficulty(diff)
+    for seed in seeds:
+        sim = Simulation(diff, missions=[Mission(d) for d in defs],
+                         seed=seed, params=params)
+        bot = POLICIES[policy](seed=seed)
+        limit = int(MAX_SECONDS / SIM_DT)
+        while not sim.dead and sim.frame < limit:
+            sim.step(SIM_DT, bot(sim))
+        hist[int(sim.elapsed / HIST_BIN)] += 1; total_t += sim.elapsed
+        if sim.dead:
+            c = crash_cause(sim); causes[c] = causes.get(c, 0) + 1
+        else: censored += 1
+        for m in sim.missions:
+            if m.completed: mission_done[m.label()] = mission_done.get(m.label(), 0) + 1
+    return dict(key=key, diff=diff, params=params, policy=policy, chunk=chunk, runs=len(seeds),
+                hist=hist, causes=causes, missions=mission_done, censored=censored, seconds=total_t)
+
+# ---------------- aggregation ----------------
+def merge(records, keys=None):
+    latest = {(r["key"], r["chunk"]): r for r in records}  # a re-run chunk replaces the old one
+    out = {}
+    for r in latest.values():
+        if keys is not None and r["key"] not in keys: continue
+        a = out.setdefault(r["key"], dict(diff=r["diff"], params=r["params"], policy=r["policy"], runs=0,
+                                         hist=[0]*len(r["hist"]), causes={}, missions={}, censored=0, seconds=0.0))
+        a["runs"] += r["runs"]; a["censored"] += r["censored"]; a["seconds"] += r["seconds"]
+        a["hist"] = [x+y for x, y in zip(a["hist"], r["hist"])]
+        for field in ("causes", "missions"):
+            for k, v in r[field].items(): a[field][k] = a[field].get(k, 0) + v
+    return out
+
+def survival(hist, t):
+    """Fraction of runs still alive at t seconds."""
+    n = sum(hist)
+    return sum(hist[int(t / HIST_BIN):]) / n if n else 0.0
+
+def quantile(hist, q):
+    n = sum(hist); acc = 0
+    for i, c in enumerate(hist):
+        acc += c
+        if acc >= q*n: return i*HIST_BIN
+    return len(hist)*HIST_BIN
+
+def curve_error(hist, target):
+    return sum((survival(hist, t) - p)**2 for t, p in target)
+
+# ---------------- jobs ----------------
+def param_grid(grid):
+    if not grid: return [{}]
+    names = list(grid)
+    return [dict(zip(names, vals)) for vals in itertools.product(*(grid[n] for n in names))]
+
+def config_key(diff, params, policy, seed):
+    return json.dumps([diff, params, policy, seed], sort_keys=True)
+
+def build_jobs(diffs, grid, policy, runs, seed, done):
+    """Jobs still missing from `done` ({(key, chunk): runs}). Every config uses
+    the same seeds, so parameter sets are compared on identical traffic."""
+    jobs = []; keys = set()
+    for diff in diffs:
+        for params in param_grid(grid):
+            key = config_key(diff, params, policy, seed); keys.add(key)
+            for chunk in range((runs + CHUNK - 1)//CHUNK):
+                n = min(CHUNK, runs - chunk*CHUNK)
+                if done.get((key, chunk)) == n: continue
+                lo = seed + chunk*CHUNK
+                jobs.append((key, diff, params, policy, chunk, range(lo, lo + n)))
+    return jobs, keys
+
+def load_records(path):
+    if not os.path.exists(path): return []
+    records = []
+    with open(path) as f:
+        for line in f:
+            try: records.append(json.loads(line))
+            except ValueError: pass  # a torn last line from an interrupted sweep
+    return records
+
+def parse_grid(items):
+    grid = {}
+    for item in items or []:
+        name, _, vals = item.partition("=")
+        if name == "SPAWN":
+            grid[name] = [tuple(float(x) for x in v.split(":")) for v in vals.split(",")]
+        else:
+            grid[name] = [float(v) for v in vals.split(",")]
+    return grid
+
+def parse_target(text):
+    return [tuple(float(x) for x in p.split(":")) for p in text.split(",")] if text else []
+
+def report(agg, target):
+    rows = []
+    for key, a in agg.items():
+        h = a["hist"]
+        err = curve_error(h, target) if target else None
+        rows.append((a["diff"], err if err is not None else 0.0, key, a))
+    rows.sort(key=lambda r: (r[0], r[1]))
+    for diff, err, key, a in rows:
+        h = a["hist"]; n = a["runs"]
+        print(f"{diff:7s} {json.dumps(a['params'], sort_keys=True):40s} runs={n:6d} "
+              f"p10={quantile(h,.1):5.0f}s p50={quantile(h,.5):5.0f}s p90={quantile(h,.9):5.0f}s "
+              + (f"err={err:.4f} " if target else "")
+              + "causes=" + ",".join(f"{k}:{v/n:.0%}" for k, v in sorted(a["causes"].items()))
+              + " missions=" + ",".join(f"{k}:{v/n:.0%}" for k, v in sorted(a["missions"].items())))
+    if target:
+        for diff in sorted({r[0] for r in rows}):
+            best = min((r for r in rows if r[0] == diff), key=lambda r: r[1])
+            print(f"best {diff}: {json.dumps(best[3]['params'], sort_keys=True)} (err {best[1]:.4f})")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte-Carlo tuner for the DIFFS table")
+    ap.add_argument("--diff", action="append", choices=list(DIFFS), help="difficulty to tune (default: all)")
+    ap.add_argument("--runs", type=int, default=1000, help="runs per difficulty/parameter set")
+    ap.add_argument("--policy", default="dodge", choices=list(POLICIES))
+    ap.add_argument("--grid", action="append", metavar="NAME=v1,v2",
+                    help="parameter sweep, e.g. START_SPEED=240,260 or SPAWN=0.7:1.2,0.6:1.1")
+    ap.add_argument("--target", default="", metavar="T:P,...", help="target survival curve, e.g. 10:0.9,30:0.5")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="tuning.jsonl", help="results file; rerunning resumes from it")
+    ap.add_argument("--workers", type=int, default=os.cpu_count())
+    args = ap.parse_args(argv)
+
+    records = load_records(args.out)
+    done = {(r["key"], r["chunk"]): r["runs"] for r in records}
+    jobs, keys = build_jobs(args.diff or list(DIFFS), parse_grid(args.grid), args.policy, args.runs, args.seed, done)
+    print(f"{len(done)} chunks already done, {len(jobs)} to run on {args.workers} workers", file=sys.stderr)
+    if jobs:
+        with Pool(args.workers) as pool, open(args.out, "a") as out:
+            for i, rec in enumerate(pool.imap_unordered(run_chunk, jobs), 1):
+                out.write(json.dumps(rec) + "\n"); out.flush()
+                records.append(rec)
+                print(f"\r{i}/{len(jobs)} chunks", end="", file=sys.stderr)
+        print(file=sys.stderr)
+    report(merge(records, keys), parse_target(args.target))
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import pygame
+from collections import OrderedDict
+from render_cache import TEXT_CACHE
+from assets import ASSETS
 
 BTN_BG = (70, 130, 180)   
 BTN_HL = (100, 160, 210)  
@@ -19,8 +22,17 @@ class Buttons:
         self.hover = False
         self.disabled = False
         self.visible = True
+        self._drawn = None
+
+    def _look(self):
+        return (self.visible, self.disabled, self.hover, self.text, self.rect.topleft)
+
+    def dirty_rect(self):
+        """Screen area to refresh if the button changed since it was last drawn."""
+        return None if self._look() == self._drawn else self.rect
 
     def draw(self, surface):
+        self._drawn = self._look()
         if not self.visible:
             return
         
@@ -33,7 +45,7 @@ class Buttons:
         pygame.draw.rect(surface, (0,0,0), self.rect, 2, border_radius=10)
 
         if self.font and self.text:
-            text_surf = self.font.render(self.text, True, self.text_color)
+            text_surf = TEXT_CACHE.render(self.font, self.text, self.text_color)
             text_rect = text_surf.get_rect(center=self.rect.center)
             surface.blit(text_surf, text_rect)
     
@@ -55,7 +67,121 @@ class Buttons:
                     except Exception as e:
                         print("Button callback error: ", e)
 
+class DirtyRects:
+    """Regions of the screen that changed since the last present.
+    flush() pushes only those with pygame.display.update()."""
+    def __init__(self, bounds):
+        self.bounds = pygame.Rect(bounds)
+        self.rects = []
+        self.all = True
+
+    def add(self, rect):
+        if rect is None or self.all: return
+        r = pygame.Rect(rect).clip(self.bounds)
+        if r.w and r.h: self.rects.append(r)
+
+    def full(self):
+        self.all = True; self.rects.clear()
+
+    def __bool__(self):
+        return self.all or bool(self.rects)
+
+    def clip(self):
+        """The one rect a partial redraw has to repaint, or None when the whole screen is dirty."""
+        return None if self.all or not self.rects else self.rects[0].unionall(self.rects[1:])
+
+    def flush(self):
+        if self.all: pygame.display.flip()
+        elif self.rects: pygame.display.update(self.rects)
+        self.all = False; self.rects.clear()
+
+class ListView:
+    """Scrollable column of fixed-height cards inside `rect`.
+    render(card_surf, item, index, hover, selected) paints one card onto a
+    fresh transparent surface; results are cached (LRU, `cache_size` cards) until invalidate(),
+    so a frame blits only the few cards in view no matter how long the list
+    is. rect_of/item_at use the same layout for drawing and hit-testing."""
+    def __init__(self, rect, item_h, gap, render, cache_size=48):
+        self.rect = pygame.Rect(rect)
+        self.item_h = item_h; self.pitch = item_h + gap
+        self.render = render; self.cache_size = cache_size
+        self.items = []; self.scroll = 0
+        self.hover = -1; self.selected = -1
+        self._cards = OrderedDict()   # (index, hover, selected) -> Surface
+        self.renders = 0
+
+    def set_items(self, items):
+        self.items = list(items); self.invalidate()
+        self.scroll = min(self.scroll, self.max_scroll)
+
+    def invalidate(self, index=None):
+        """Drop cached cards (all, or just `index`'s) after their content changed."""
+        if index is None: self._cards.clear()
+        else:
+            for k in [k for k in self._cards if k[0] == index]: del self._cards[k]
+
+    # ---- layout ----
+    @property
+    def max_scroll(self):
+        return max(0, len(self.items)*self.pitch - (self.pitch - self.item_h) - self.rect.h)
+
+    def scroll_by(self, dy):
+        old = self.scroll
+        self.scroll = max(0, min(self.max_scroll, self.scroll + int(dy)))
+        return self.scroll != old
+
+    def rect_of(self, i):
+        return pygame.Rect(self.rect.x, self.rect.y + i*self.pitch - self.scroll, self.rect.w, self.item_h)
+
+    def visible(self):
+        first = max(0, self.scroll // self.pitch)
+        last = min(len(self.items), (self.scroll + self.rect.h) // self.pitch + 1)
+        return range(first, last)
+
+    def item_at(self, pos):
+        """Index of the card under `pos` (-1 for none, the gaps or outside the view)."""
+        x, y = pos
+        if not self.rect.collidepoint(x, y): return -1
+        i, off = divmod(y - self.rect.y + self.scroll, self.pitch)
+        return i if off < self.item_h and i < len(self.items) else -1
+
+    def set_hover(self, i):
+        """Returns the screen rects that need repainting (empty if unchanged)."""
+        if i == self.hover: return []
+        changed = [self.rect_of(j).clip(self.rect) for j in (self.hover, i) if j >= 0]
+        self.hover = i
+        return changed
+
+    # ---- drawing ----
+    def card(self, i):
+        key = (i, i == self.hover, i == self.selected)
+        surf = self._cards.get(key)
+        if surf is None:
+            surf = pygame.Surface((self.rect.w, self.item_h), pygame.SRCALPHA)
+            self.render(surf, self.items[i], i, key[1], key[2]); self.renders += 1
+            self._cards[key] = surf
+            if len(self._cards) > self.cache_size: self._cards.popitem(last=False)
+        else:
+            self._cards.move_to_end(key)
+        return surf
+
+    def draw(self, surf):
+        old_clip = surf.get_clip(); surf.set_clip(self.rect)
+        for i in self.visible(): surf.blit(self.card(i), self.rect_of(i))
+        surf.set_clip(old_clip)
+
+def wrap_text(text, max_chars, max_lines=None):
+    """Greedy word wrap by character count."""
+    lines = []; line = ""
+    for w in text.split():
+        if line and len(line) + len(w) + 1 > max_chars:
+            lines.append(line); line = w
+        else:
+            line = (line + " " + w).strip()
+    if line: lines.append(line)
+    return lines[:max_lines] if max_lines else lines
+
 def create_fonts():
-    MID = pygame.font.SysFont("arial", 25, bold=True)
-    SMALL = pygame.font.SysFont("arial", 15)
+    MID = ASSETS.font("arial", 25, bold=True)
+    SMALL = ASSETS.font("arial", 15)
     return MID, SMALL
@@ -0,0 +1,123 @@
+# weather.py
+# Rain drawn when Game.rain is on: falling streaks, spray kicked up behind
+# every car and glints on the wet road. Particles live in preallocated NumPy
+# arrays, update in one vectorized step tied to the road speed, and are
+# rasterized by blending every particle pixel into the frame at once through the
+# surface's pixel buffer. The number of live drops adapts so update + draw stays
+# under BUDGET_MS.
+import math, time
+import numpy as np
+from sim import WIDTH, HEIGHT, ROAD_MARGIN, SLOW_FACTOR
+from entities import KIND_ENEMY
+
+MAX_DROPS = 3000
+MIN_DROPS = 200
+MAX_SPRAY = 600
+GLINTS = 40
+BUDGET_MS = 0.8             # target cost of update + draw per frame
+FRAME_MS = 1000.0/60 * 1.2  # frames slower than this also shed drops
+ADAPT_EVERY = 15            # frames between budget adjustments
+
+FALL = 700.0                # px/s a drop falls on its own; the road speed adds to it
+WIND = -0.08                # sideways px per px fallen
+STREAK = 8                  # pixels per streak (spacing stretches with speed)
+SPRAY_LIFE = 0.3
+RAIN_COLOR = (195, 210, 235)
+
+class Rain:
+    def __init__(self, seed=None, max_drops=MAX_DROPS):
+        rng = self.rng = np.random.default_rng(seed)
+        self.max = max_drops; self.budget = max_drops // 3
+        self.x = rng.uniform(0, WIDTH, max_drops); self.y = rng.uniform(-HEIGHT, HEIGHT, max_drops)
+        self.z = rng.uniform(0.4, 1.0, max_drops)          # depth: scales speed, length and opacity
+        self.sx = np.zeros(MAX_SPRAY); self.sy = np.zeros(MAX_SPRAY)
+        self.svx = np.zeros(MAX_SPRAY); self.svy = np.zeros(MAX_SPRAY); self.slife = np.zeros(MAX_SPRAY)
+        self.spray_at = 0
+        self.gx = rng.uniform(ROAD_MARGIN + 4, WIDTH - ROAD_MARGIN - 8, GLINTS); self.gy = rng.uniform(0, HEIGHT, GLINTS)
+        self.gphase = rng.uniform(0, 2*math.pi, GLINTS)
+        self.k = np.arange(STREAK, dtype=np.float32)
+        self.ws = (self.z[:, None] * (90 - 80*self.k/STREAK)).astype(np.int32)   # per-pixel streak opacity /256
+        # scratch for draw(): every particle pixel of a frame, written in place
+        size = max_drops*STREAK + MAX_SPRAY + 3*GLINTS
+        self._px = np.empty(size, np.float32); self._py = np.empty(size, np.float32); self._w = np.empty(size, np.int32)
+        self._d = np.empty((max_drops, STREAK), np.float32)
+        self.speed = 0.0; self.scroll = 0.0; self.t = 0.0
+        self.cost = self.frame_ms = 0.0; self.frames = 0; self._spent = 0.0
+
+    # ---- simulation ----
+    def update(self, dt, sim):
+        t0 = time.perf_counter()
+        self.t += dt
+        speed = self.speed = sim.speed * (SLOW_FACTOR if sim.slow_t > 0 else 1.0)
+        self.scroll = (self.scroll + speed*dt) % HEIGHT      # road-locked offset for the glints
+        n = self.budget; x, y, z = self.x[:n], self.y[:n], self.z[:n]
+        fall = (FALL + speed) * dt * z
+        y += fall; x += fall * WIND
+        out = y > HEIGHT
+        k = int(np.count_nonzero(out))
+        if k: y[out] -= HEIGHT + STREAK*4; x[out] = self.rng.uniform(0, WIDTH, k)
+        x %= WIDTH
+        # spray from the back of every car on screen, carried along by the road
+        ents = sim.ents; i = ents.indices(KIND_ENEMY)
+        cx = np.append(ents.x[i], sim.player.x); cy = np.append(ents.y[i] + ents.h[i]/2, sim.player.bottom)
+        on = (cy > 0) & (cy < HEIGHT); cx, cy = cx[on], cy[on]
+        m = min(MAX_SPRAY, 3*len(cx) * n // self.max + len(cx))
+        if m:
+            s = (self.spray_at + np.arange(m)) % MAX_SPRAY; self.spray_at = int(s[-1] + 1) % MAX_SPRAY
+            src = self.rng.integers(0, len(cx), m)
+            self.sx[s] = cx[src] + self.rng.uniform(-16, 16, m); self.sy[s] = cy[src]
+            self.svx[s] = self.rng.uniform(-70, 70, m); self.svy[s] = speed * 0.8 + self.rng.uniform(-60, 20, m)
+            self.slife[s] = SPRAY_LIFE
+        self.sx += self.svx*dt; self.sy += self.svy*dt; self.slife -= dt
+        self._spent = time.perf_counter() - t0
+
+    def adapt(self, frame_ms):
+        """Once per played frame: grow or shed drops to hold BUDGET_MS, and shed
+        them too while the whole frame keeps running over FRAME_MS."""
+        self.frame_ms = frame_ms if not self.frame_ms else self.frame_ms*0.9 + min(frame_ms, 100.0)*0.1
+        self.frames += 1
+        if self.frames % ADAPT_EVERY: return
+        if self.cost > BUDGET_MS or self.frame_ms > FRAME_MS: self.budget = max(MIN_DROPS, int(self.budget * 0.85))
+        elif self.cost < BUDGET_MS * 0.6: self.budget = min(self.max, self.budget + max(1, self.budget // 10))
+
+    # ---- rasterizing ----
+    def draw(self, surf):
+        t0 = time.perf_counter()
+        if surf.get_bytesize() != 4: return                  # the blend works on packed 32-bit pixels
+        n = self.budget; m = n*STREAK
+        px, py, w = self._px, self._py, self._w
+        # streak pixels: head at (x, y), tail trailing up-wind and fading (weights baked in self.ws)
+        stretch = min(1.25, 0.5 + self.speed / 600.0) * self.z[:n]   # longer streaks at speed, gaps past 1 px
+        d = np.multiply(self.k, stretch[:, None], out=self._d[:n])
+        np.subtract(self.y[:n, None], d, out=py[:m].reshape(n, STREAK))
+        d *= -WIND; np.add(self.x[:n, None], d, out=px[:m].reshape(n, STREAK))
+        w[:m] = self.ws[:n].ravel()
+        # spray droplets fade with life; glints flicker in place on the road
+        alive = self.slife > 0; e = m + int(np.count_nonzero(alive))
+        px[m:e] = self.sx[alive]; py[m:e] = self.sy[alive]; w[m:e] = self.slife[alive] * (150 / SPRAY_LIFE)
+        gy = (self.gy + self.scroll) % HEIGHT; gw = 70 + 70*np.sin(self.t*6 + self.gphase)
+        for dx in range(3):
+            px[e:e + GLINTS] = self.gx + dx; py[e:e + GLINTS] = gy; w[e:e + GLINTS] = gw; e += GLINTS
+        clip = surf.get_clip()
+        ix = px[:e].astype(np.int32); iy = py[:e].astype(np.int32); ix -= clip.x; iy -= clip.y
+        # negative coordinates wrap to huge unsigned values, so one compare per axis clips both ends
+        keep = (ix.view(np.uint32) < clip.w) & (iy.view(np.uint32) < clip.h)
+        iy += clip.y; iy *= surf.get_pitch() // 4; iy += ix; iy += clip.x
+        at = iy[keep]; wk = w[:e][keep]
+        # one gather + scatter on the flat pixel buffer, channels unpacked with the surface's own shifts
+        buf = np.frombuffer(surf.get_buffer(), np.uint32)
+        p = buf[at].astype(np.int32); out = p & self._keep_bits(surf)
+        for shift, tint in zip(surf.get_shifts()[:3], RAIN_COLOR):
+            ch = (p >> shift) & 255
+            ch += ((tint - ch) * wk) >> 8
+            out |= ch << shift
+        buf[at] = out
+        del buf                                               # unlock the surface
+        ms = (self._spent + time.perf_counter() - t0) * 1000.0; self._spent = 0.0
+        self.cost = ms if not self.cost else self.cost*0.9 + ms*0.1
+
+    @staticmethod
+    def _keep_bits(surf):
+        """The alpha/padding bits of a packed pixel, left untouched by the blend."""
+        r, g, b, _ = surf.get_masks()
+        return np.int32(np.uint32(~(r | g | b) & 0xFFFFFFFF).view(np.int32))